@@ -13,6 +13,7 @@ from src.config import Config
 from src.utils.session import SessionManager
 from src.processing.document_processor import DocumentProcessor
 from src.database.vector_db import VectorStore
+from src.utils.embeddings import encode_texts, get_embedding_model
 
 st.set_page_config(
     page_title="Customer Support AI",
@@ -29,15 +30,16 @@ logger = logging.getLogger(__name__)
 if not Config.LOGGING_ENABLED:
     logging.disable(logging.CRITICAL)
 
+@st.cache_resource(show_spinner="Initializing AI agents...")
+def get_orchestrator():
+    """Get the multi-agent orchestrator shared by every session in this process"""
+    return MultiAgentOrchestrator()
+
 def initialize_system():
     """Initialize the multi-agent system"""
     try:
         Config.validate()
-        
-        if st.session_state.orchestrator is None:
-            with st.spinner("Initializing AI agents..."):
-                st.session_state.orchestrator = MultiAgentOrchestrator()
-        
+        get_orchestrator()
         return True
     except Exception as e:
         st.error(f"Failed to initialize system: {e}")
@@ -67,67 +69,55 @@ def process_uploaded_pdf(uploaded_file, persist=False):
             return False, "Failed to process PDF"
         
         if persist:
-            vector_store = st.session_state.orchestrator.rag_agent.vector_store
+            vector_store = get_orchestrator().rag_agent.vector_store
             
             documents = [chunk['text'] for chunk in chunks]
             metadatas = [chunk['metadata'] for chunk in chunks]
+            ids = [DocumentProcessor.chunk_id(chunk) for chunk in chunks]
             
-            existing_count = vector_store.get_collection_stats()['total_documents']
-            ids = [f"chunk_{existing_count + i}" for i in range(len(chunks))]
-            
-            success = vector_store.add_documents(documents, metadatas, ids)
+            # Re-uploading a file replaces its previous chunks instead of duplicating them
+            success = vector_store.replace_source(uploaded_file.name, documents, metadatas, ids)
             
             if success:
+                vector_store.ensure_vector_index()
                 return True, f"✅ Permanently stored {len(chunks)} chunks from {uploaded_file.name}"
             else:
                 return False, "Failed to add documents to vector store"
         else:
-            if 'temp_documents' not in st.session_state:
-                st.session_state.temp_documents = []
-            
-            st.session_state.temp_documents.extend(chunks)
-            
             if not os.path.exists(file_path):
                 return False, "Temporary file not accessible"
             
-            return True, f"📄 Temporarily loaded {len(chunks)} chunks from {uploaded_file.name} (session only)"
+            embeddings = encode_texts([chunk['text'] for chunk in chunks], Config.EMBEDDING_MODEL)
+            
+            evicted = st.session_state.temp_index.add(chunks, embeddings)
+            
+            message = f"📄 Temporarily loaded {len(chunks)} chunks from {uploaded_file.name} (session only)"
+            if evicted:
+                evicted_keys = {f"{source}_temp" for source in evicted}
+                st.session_state.processed_files = [
+                    f for f in st.session_state.get('processed_files', []) if f not in evicted_keys
+                ]
+                message += f". Removed {', '.join(evicted)} to stay within the session memory limit"
+            return True, message
             
     except Exception as e:
         return False, f"Error processing PDF: {str(e)}"
 
 def search_temp_documents(query, k=4):
     """Search temporary documents without vector store"""
-    if 'temp_documents' not in st.session_state or not st.session_state.temp_documents:
+    if not st.session_state.temp_index:
         return None
     
-    from sentence_transformers import SentenceTransformer
-    import numpy as np
+    model = get_embedding_model(Config.EMBEDDING_MODEL)
     
-    model = SentenceTransformer(Config.EMBEDDING_MODEL)
+    query_embedding = model.encode(query, convert_to_numpy=True, normalize_embeddings=True)
     
-    query_embedding = model.encode(query)
-    
-    doc_texts = [chunk['text'] for chunk in st.session_state.temp_documents]
-    doc_embeddings = model.encode(doc_texts)
-    
-    similarities = np.dot(doc_embeddings, query_embedding)
-    top_k_indices = np.argsort(similarities)[-k:][::-1]
-    
-    results = []
-    for idx in top_k_indices:
-        chunk = st.session_state.temp_documents[idx]
-        results.append({
-            'document': chunk['text'],
-            'metadata': chunk['metadata'],
-            'distance': float(1 - similarities[idx])
-        })
-    
-    return results
+    return st.session_state.temp_index.search(query_embedding, k=k)
 
 def delete_permanent_document(filename):
     """Delete a specific document from permanent storage"""
     try:
-        vector_store = st.session_state.orchestrator.rag_agent.vector_store
+        vector_store = get_orchestrator().rag_agent.vector_store
         
         success = vector_store.delete_by_source(filename)
         
@@ -152,16 +142,10 @@ def delete_permanent_document(filename):
 def delete_temporary_document(filename):
     """Delete a specific temporary document"""
     try:
-        if 'temp_documents' not in st.session_state:
+        if not st.session_state.temp_index:
             return False, "No temporary documents"
         
-        original_count = len(st.session_state.temp_documents)
-        st.session_state.temp_documents = [
-            chunk for chunk in st.session_state.temp_documents 
-            if chunk['metadata']['source'] != filename
-        ]
-        
-        deleted_count = original_count - len(st.session_state.temp_documents)
+        deleted_count = st.session_state.temp_index.remove_source(filename)
         
         if deleted_count == 0:
             return False, "Document not found"
@@ -174,7 +158,7 @@ def delete_temporary_document(filename):
 def get_all_permanent_files():
     """Get list of all files in permanent vector store"""
     try:
-        vector_store = st.session_state.orchestrator.rag_agent.vector_store
+        vector_store = get_orchestrator().rag_agent.vector_store
         return vector_store.get_all_sources()
     except Exception as e:
         return []
@@ -228,21 +212,21 @@ def render_sidebar():
         
         st.subheader("📊 System Status")
         
-        if st.session_state.orchestrator:
-            try:
-                sql_stats = st.session_state.orchestrator.sql_agent.get_database_stats()
-                vector_stats = st.session_state.orchestrator.rag_agent.vector_store.get_collection_stats()
-                
-                st.metric("Customers", sql_stats.get('customers', 'N/A'))
-                st.metric("Support Tickets", sql_stats.get('tickets', 'N/A'))
-                st.metric("Permanent Chunks", vector_stats.get('total_documents', 'N/A'))
-                
-                temp_count = len(st.session_state.get('temp_documents', []))
-                if temp_count > 0:
-                    st.metric("Temporary Chunks", temp_count)
-                
-            except Exception as e:
-                st.warning("Unable to fetch stats")
+        try:
+            orchestrator = get_orchestrator()
+            sql_stats = orchestrator.sql_agent.get_database_stats()
+            vector_stats = orchestrator.rag_agent.vector_store.get_collection_stats()
+            
+            st.metric("Customers", sql_stats.get('customers', 'N/A'))
+            st.metric("Support Tickets", sql_stats.get('tickets', 'N/A'))
+            st.metric("Permanent Chunks", vector_stats.get('total_documents', 'N/A'))
+            
+            temp_count = len(st.session_state.temp_index)
+            if temp_count > 0:
+                st.metric("Temporary Chunks", temp_count)
+            
+        except Exception as e:
+            st.warning("Unable to fetch stats")
         
         st.markdown("---")
         
@@ -251,8 +235,7 @@ def render_sidebar():
             st.rerun()
         
         if st.button("🔄 Clear All Temporary", use_container_width=True):
-            if 'temp_documents' in st.session_state:
-                st.session_state.temp_documents = []
+            st.session_state.temp_index.clear()
             if 'processed_files' in st.session_state:
                 st.session_state.processed_files = [f for f in st.session_state.processed_files if 'persist' in f]
             st.success("All temporary documents cleared")
@@ -272,9 +255,7 @@ def render_sidebar():
         st.markdown("---")
         
         all_permanent_files = get_all_permanent_files()
-        temp_files = []
-        if 'temp_documents' in st.session_state:
-            temp_files = list(set([chunk['metadata']['source'] for chunk in st.session_state.temp_documents]))
+        temp_files = st.session_state.temp_index.sources()
         
         if all_permanent_files or temp_files:
             st.subheader("📁 Documents")
@@ -352,7 +333,7 @@ def render_chat():
 
             conversation_history = SessionManager.get_conversation_history()
 
-            has_temp_docs = 'temp_documents' in st.session_state and len(st.session_state.temp_documents) > 0
+            has_temp_docs = len(st.session_state.temp_index) > 0
 
             response = ""
 
@@ -390,7 +371,7 @@ def render_chat():
                         render_with_cursor(response, "📄 **From Temporary Document:**\n\n")
                 else:
                     status_placeholder.markdown("🧠 **Generating response...**")
-                    for chunk in st.session_state.orchestrator.stream_query(
+                    for chunk in get_orchestrator().stream_query(
                         prompt,
                         conversation_history[:-1] if len(conversation_history) > 1 else None
                     ):
@@ -398,7 +379,7 @@ def render_chat():
                         render_with_cursor(response)
             else:
                 status_placeholder.markdown("🧠 **Generating response...**")
-                for chunk in st.session_state.orchestrator.stream_query(
+                for chunk in get_orchestrator().stream_query(
                     prompt,
                     conversation_history[:-1] if len(conversation_history) > 1 else None
                 ):
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from src.agents.router import ROUTING_EXAMPLES, LocalRouter, RouterAgent
+from src.config import Config
+from test_agents import TEST_QUERIES
+
+def expected_agent(label):
+    """Map the short labels used in test_agents.py to router agent names"""
+    return label if label == "BOTH" else f"{label}_AGENT"
+
+def normalize(text):
+    """Compare queries ignoring case, punctuation and spacing"""
+    return " ".join("".join(c for c in text.lower() if c.isalnum() or c.isspace()).split())
+
+def held_out_examples():
+    """Routing examples with any test query removed, so accuracy is measured on unseen queries"""
+    test_set = {normalize(query) for query, _ in TEST_QUERIES}
+    examples = {
+        agent: [example for example in samples if normalize(example) not in test_set]
+        for agent, samples in ROUTING_EXAMPLES.items()
+    }
+    
+    overlap = sum(len(samples) for samples in ROUTING_EXAMPLES.values()) - sum(len(samples) for samples in examples.values())
+    if overlap:
+        print(f"Held out {overlap} routing examples that also appear in the test queries")
+    return examples
+
+def evaluate_router(use_llm=False):
+    """Measure local router coverage and accuracy against the labelled test queries"""
+    
+    local_router = LocalRouter(examples=held_out_examples())
+    llm_router = RouterAgent() if use_llm else None
+    
+    handled = 0
+    local_correct = 0
+    overall_correct = 0
+    
+    print("="*60)
+    print("Evaluating Local Router")
+    print("="*60)
+    
+    for query, label in TEST_QUERIES:
+        expected = expected_agent(label)
+        
+        start_time = time.perf_counter()
+        decision = local_router.classify(query)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        
+        if decision:
+            handled += 1
+            predicted = decision["agent"]
+            local_correct += predicted == expected
+            path = "local"
+        elif llm_router:
+            predicted = llm_router.route_with_llm(query).get("agent")
+            path = "llm"
+        else:
+            predicted = None
+            path = "deferred"
+        
+        overall_correct += predicted == expected
+        status = "OK" if predicted == expected else ("--" if predicted is None else "MISS")
+        print(f"[{status}] {path:<8} {elapsed_ms:6.1f}ms  expected={expected:<9} got={predicted}  {query}")
+    
+    total = len(TEST_QUERIES)
+    print("\n" + "="*60)
+    print(f"Local coverage: {handled}/{total} ({handled / total:.0%})")
+    if handled:
+        print(f"Local accuracy: {local_correct}/{handled} ({local_correct / handled:.0%})")
+    if use_llm:
+        print(f"Overall accuracy with LLM fallback: {overall_correct}/{total} ({overall_correct / total:.0%})")
+    print("="*60)
+
+if __name__ == "__main__":
+    use_llm = "--llm" in sys.argv
+    
+    if use_llm:
+        Config.validate()
+    
+    evaluate_router(use_llm=use_llm)
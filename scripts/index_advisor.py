@@ -0,0 +1,61 @@
+import argparse
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import Config
+from src.database.query_advisor import load_observations, recommend_indexes
+
+def run_advisor(min_count=1, apply=False):
+    """Report composite index recommendations from recorded query plans"""
+    
+    observations = load_observations()
+    
+    print("="*60)
+    print("SQL Index Advisor")
+    print("="*60)
+    print(f"Plan log: {Config.QUERY_PLAN_LOG_PATH}")
+    print(f"Recorded queries: {len(observations)}")
+    
+    print(f"Queries with full table scans: {sum(1 for o in observations if o.get('scans'))}")
+    print(f"Queries sorting with a temp b-tree: {sum(1 for o in observations if o.get('temp_sort'))}")
+    
+    if not os.path.exists(Config.DATABASE_PATH):
+        print(f"Database not found at {Config.DATABASE_PATH}")
+        return
+    
+    conn = sqlite3.connect(Config.DATABASE_PATH)
+    
+    try:
+        recommendations = recommend_indexes(conn, observations, min_count=min_count)
+        
+        if not recommendations:
+            print("\nNo index recommendations.")
+            return
+        
+        print()
+        for rec in recommendations:
+            print(f"{rec['table']}({', '.join(rec['columns'])}) - {rec['queries']} queries, {rec['full_scans']} full scans")
+            print(f"  e.g. {rec['example_query'][:120]}")
+            print(f"  {rec['sql']};")
+        
+        if apply:
+            print("\nCreating indexes...")
+            for rec in recommendations:
+                conn.execute(rec["sql"])
+                print(f"Created: {rec['sql']}")
+            conn.execute("ANALYZE")
+            conn.commit()
+            print("Statistics refreshed with ANALYZE")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recommend SQLite indexes from recorded query plans")
+    parser.add_argument("--min-count", type=int, default=1, help="Minimum matching queries before an index is recommended")
+    parser.add_argument("--apply", action="store_true", help="Create the recommended indexes")
+    args = parser.parse_args()
+    
+    run_advisor(min_count=args.min_count, apply=args.apply)
@@ -4,10 +4,11 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.processing.document_processor import DocumentProcessor
+from src.processing.ingestion import IngestionPipeline
 from src.database.vector_db import VectorStore
 from src.config import Config
 
-def ingest_sample_policies():
+def ingest_sample_policies(force=False):
     """Ingest sample policy documents into vector store"""
     
     policy_dir = "./data/sample_policies/"
@@ -24,30 +25,24 @@ def ingest_sample_policies():
         print("Initializing vector store...")
         vector_store = VectorStore()
         
-        print(f"\nProcessing PDFs from {policy_dir}")
-        all_chunks = processor.process_directory(policy_dir)
+        print(f"\nStreaming PDFs from {policy_dir} into LanceDB ...")
+        pipeline = IngestionPipeline(processor, vector_store)
+        result = pipeline.run(policy_dir, force=force)
         
-        if not all_chunks:
-            print("No chunks generated from PDFs")
+        if result is None:
             return False
         
-        print(f"\nPreparing {len(all_chunks)} chunks for ingestion...")
-        
-        documents = [chunk['text'] for chunk in all_chunks]
-        metadatas = [chunk['metadata'] for chunk in all_chunks]
-        ids = [f"chunk_{i}" for i in range(len(all_chunks))]
-        
-        print("Ingesting documents into LanceDB ...")
-        success = vector_store.add_documents(documents, metadatas, ids)
-        
-        if success:
-            stats = vector_store.get_collection_stats()
-            print(f"\nIngestion complete!")
-            print(f"Total documents in collection: {stats['total_documents']}")
-            return True
-        else:
-            print("Ingestion failed")
+        if result["failed"]:
+            print(f"\nIngestion incomplete: could not extract text from {', '.join(result['failed'])}")
+            print("Their previous chunks were kept; fix or remove the files and run again")
             return False
+        
+        stats = vector_store.get_collection_stats()
+        print(f"\nIngestion complete!")
+        print(f"Ingested {result['chunks']} chunks from {result['changed']} new or changed files "
+              f"({result['removed']} removed, {result['files']} total)")
+        print(f"Total documents in collection: {stats['total_documents']}")
+        return True
             
     except Exception as e:
         print(f"Error during ingestion: {e}")
@@ -92,7 +87,7 @@ if __name__ == "__main__":
     
     Config.validate()
     
-    success = ingest_sample_policies()
+    success = ingest_sample_policies(force="--force" in sys.argv)
     
     if success:
         test_retrieval()
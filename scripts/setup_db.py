@@ -5,6 +5,184 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.config import Config
 
+def create_ticket_search_index(cursor):
+    """Create the FTS5 index over ticket text and the triggers that keep it in sync"""
+    
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS support_tickets_fts USING fts5(
+        subject,
+        description,
+        content='support_tickets',
+        content_rowid='ticket_id'
+    )
+    """)
+    
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS support_tickets_fts_ai AFTER INSERT ON support_tickets BEGIN
+        INSERT INTO support_tickets_fts(rowid, subject, description)
+        VALUES (new.ticket_id, new.subject, new.description);
+    END
+    """)
+    
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS support_tickets_fts_ad AFTER DELETE ON support_tickets BEGIN
+        INSERT INTO support_tickets_fts(support_tickets_fts, rowid, subject, description)
+        VALUES ('delete', old.ticket_id, old.subject, old.description);
+    END
+    """)
+    
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS support_tickets_fts_au AFTER UPDATE OF subject, description ON support_tickets BEGIN
+        INSERT INTO support_tickets_fts(support_tickets_fts, rowid, subject, description)
+        VALUES ('delete', old.ticket_id, old.subject, old.description);
+        INSERT INTO support_tickets_fts(rowid, subject, description)
+        VALUES (new.ticket_id, new.subject, new.description);
+    END
+    """)
+    
+    # Index tickets that existed before the FTS table was added
+    cursor.execute("INSERT INTO support_tickets_fts(support_tickets_fts) VALUES ('rebuild')")
+
+OPEN_STATUSES = "('open', 'in_progress')"
+
+def _summary_add_statements(row):
+    """Statements that add one ticket row (new or old) to the summary tables"""
+    return f"""
+        INSERT INTO ticket_stats (status, priority, category, ticket_count)
+        VALUES (IFNULL({row}.status, 'unknown'), IFNULL({row}.priority, 'unknown'), IFNULL({row}.category, 'uncategorized'), 1)
+        ON CONFLICT (status, priority, category) DO UPDATE SET ticket_count = ticket_count + 1;
+        
+        INSERT INTO customer_ticket_stats (customer_id, open_tickets, total_tickets)
+        SELECT {row}.customer_id, {row}.status IN {OPEN_STATUSES}, 1 WHERE {row}.customer_id IS NOT NULL
+        ON CONFLICT (customer_id) DO UPDATE SET
+            open_tickets = open_tickets + excluded.open_tickets,
+            total_tickets = total_tickets + 1;
+        
+        INSERT INTO ticket_resolution_stats (priority, category, resolved_tickets, total_resolution_hours)
+        SELECT IFNULL({row}.priority, 'unknown'), IFNULL({row}.category, 'uncategorized'), 1,
+               (julianday({row}.resolved_at) - julianday({row}.created_at)) * 24
+        WHERE julianday({row}.resolved_at) IS NOT NULL AND julianday({row}.created_at) IS NOT NULL
+        ON CONFLICT (priority, category) DO UPDATE SET
+            resolved_tickets = resolved_tickets + 1,
+            total_resolution_hours = total_resolution_hours + excluded.total_resolution_hours;
+    """
+
+def _summary_remove_statements(row):
+    """Statements that remove one ticket row (new or old) from the summary tables"""
+    return f"""
+        UPDATE ticket_stats SET ticket_count = ticket_count - 1
+        WHERE status = IFNULL({row}.status, 'unknown')
+          AND priority = IFNULL({row}.priority, 'unknown')
+          AND category = IFNULL({row}.category, 'uncategorized');
+        DELETE FROM ticket_stats WHERE ticket_count <= 0;
+        
+        UPDATE customer_ticket_stats SET
+            open_tickets = open_tickets - ({row}.status IN {OPEN_STATUSES}),
+            total_tickets = total_tickets - 1
+        WHERE customer_id = {row}.customer_id;
+        DELETE FROM customer_ticket_stats WHERE total_tickets <= 0;
+        
+        UPDATE ticket_resolution_stats SET
+            resolved_tickets = resolved_tickets - 1,
+            total_resolution_hours = total_resolution_hours - (julianday({row}.resolved_at) - julianday({row}.created_at)) * 24
+        WHERE julianday({row}.resolved_at) IS NOT NULL AND julianday({row}.created_at) IS NOT NULL
+          AND priority = IFNULL({row}.priority, 'unknown')
+          AND category = IFNULL({row}.category, 'uncategorized');
+        DELETE FROM ticket_resolution_stats WHERE resolved_tickets <= 0;
+    """
+
+def create_summary_tables(cursor):
+    """Create ticket summary tables and the triggers that maintain them incrementally"""
+    
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ticket_stats (
+        status TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        category TEXT NOT NULL,
+        ticket_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (status, priority, category)
+    ) WITHOUT ROWID
+    """)
+    
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS customer_ticket_stats (
+        customer_id INTEGER PRIMARY KEY,
+        open_tickets INTEGER NOT NULL DEFAULT 0,
+        total_tickets INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ticket_resolution_stats (
+        priority TEXT NOT NULL,
+        category TEXT NOT NULL,
+        resolved_tickets INTEGER NOT NULL DEFAULT 0,
+        total_resolution_hours REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (priority, category)
+    ) WITHOUT ROWID
+    """)
+    
+    # Recreated so databases built before total_resolution_hours was exposed pick up the column
+    cursor.execute("DROP VIEW IF EXISTS ticket_resolution_summary")
+    cursor.execute("""
+    CREATE VIEW ticket_resolution_summary AS
+    SELECT priority, category, resolved_tickets, total_resolution_hours,
+           total_resolution_hours / resolved_tickets AS avg_resolution_hours
+    FROM ticket_resolution_stats
+    """)
+    
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS support_tickets_summary_ai AFTER INSERT ON support_tickets BEGIN
+        {_summary_add_statements("new")}
+    END
+    """)
+    
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS support_tickets_summary_ad AFTER DELETE ON support_tickets BEGIN
+        {_summary_remove_statements("old")}
+    END
+    """)
+    
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS support_tickets_summary_au
+    AFTER UPDATE OF customer_id, status, priority, category, created_at, resolved_at ON support_tickets BEGIN
+        {_summary_remove_statements("old")}
+        {_summary_add_statements("new")}
+    END
+    """)
+    
+    refresh_summary_tables(cursor)
+
+def refresh_summary_tables(cursor):
+    """Rebuild the summary tables from support_tickets"""
+    
+    cursor.execute("DELETE FROM ticket_stats")
+    cursor.execute("""
+    INSERT INTO ticket_stats (status, priority, category, ticket_count)
+    SELECT IFNULL(status, 'unknown'), IFNULL(priority, 'unknown'), IFNULL(category, 'uncategorized'), COUNT(*)
+    FROM support_tickets
+    GROUP BY 1, 2, 3
+    """)
+    
+    cursor.execute("DELETE FROM customer_ticket_stats")
+    cursor.execute(f"""
+    INSERT INTO customer_ticket_stats (customer_id, open_tickets, total_tickets)
+    SELECT customer_id, SUM(status IN {OPEN_STATUSES}), COUNT(*)
+    FROM support_tickets
+    WHERE customer_id IS NOT NULL
+    GROUP BY customer_id
+    """)
+    
+    cursor.execute("DELETE FROM ticket_resolution_stats")
+    cursor.execute("""
+    INSERT INTO ticket_resolution_stats (priority, category, resolved_tickets, total_resolution_hours)
+    SELECT IFNULL(priority, 'unknown'), IFNULL(category, 'uncategorized'), COUNT(*),
+           SUM((julianday(resolved_at) - julianday(created_at)) * 24)
+    FROM support_tickets
+    WHERE julianday(resolved_at) IS NOT NULL AND julianday(created_at) IS NOT NULL
+    GROUP BY 1, 2
+    """)
+
 def create_database():
     """Create SQLite database with customer support schema"""
     
@@ -47,6 +225,9 @@ def create_database():
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_ticket_customer ON support_tickets(customer_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_ticket_status ON support_tickets(status)")
         
+        create_ticket_search_index(cursor)
+        create_summary_tables(cursor)
+        
         conn.commit()
         conn.close()
         
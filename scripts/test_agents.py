@@ -6,6 +6,15 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from src.orchestration.graph import MultiAgentOrchestrator
 from src.config import Config
 
+TEST_QUERIES = [
+    ("What is the refund policy?", "RAG"),
+    ("How many customers do we have?", "SQL"),
+    ("List all premium tier customers", "SQL"),
+    ("How do I cancel my subscription?", "RAG"),
+    ("What are the open support tickets?", "SQL"),
+    ("What information do you collect about users?", "RAG")
+]
+
 def test_orchestrator():
     """Test the multi-agent orchestrator"""
     
@@ -19,16 +28,7 @@ def test_orchestrator():
         print("Testing Multi-Agent Orchestrator")
         print("="*60)
         
-        test_queries = [
-            ("What is the refund policy?", "RAG"),
-            ("How many customers do we have?", "SQL"),
-            ("List all premium tier customers", "SQL"),
-            ("How do I cancel my subscription?", "RAG"),
-            ("What are the open support tickets?", "SQL"),
-            ("What information do you collect about users?", "RAG")
-        ]
-        
-        for i, (query, expected_agent) in enumerate(test_queries, 1):
+        for i, (query, expected_agent) in enumerate(TEST_QUERIES, 1):
             print(f"\n{'='*60}")
             print(f"Test {i}: {query}")
             print(f"Expected Agent: {expected_agent}")
@@ -1,6 +1,7 @@
 from openai import OpenAI
 from src.config import Config
 from src.database.vector_db import VectorStore
+from src.utils.tokens import count_tokens, truncate_to_tokens
 import logging
 import time
 
@@ -15,13 +16,15 @@ class RAGAgent:
         self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
         self.vector_store = VectorStore()
     
-    def retrieve_documents(self, query, k=None):
+    def retrieve_documents(self, query, k=None, query_embedding=None):
         """Retrieve relevant documents from vector store"""
-        k = k or Config.TOP_K_RETRIEVAL
+        if not k:
+            # In budget mode fetch extra candidates; format_context keeps as many as fit
+            k = Config.RAG_BUDGET_CANDIDATES if Config.RAG_CONTEXT_TOKEN_BUDGET else Config.TOP_K_RETRIEVAL
         start_time = time.perf_counter()
         
         try:
-            results = self.vector_store.similarity_search(query, k=k)
+            results = self.vector_store.similarity_search(query, k=k, query_embedding=query_embedding)
             
             if not results:
                 self.logger.info("RAG retrieval returned 0 docs in %.2fs", time.perf_counter() - start_time)
@@ -36,26 +39,49 @@ class RAGAgent:
             return None
     
     def format_context(self, retrieved_docs):
-        """Format retrieved documents as context for LLM"""
+        """Format retrieved documents as context for LLM, packed into RAG_CONTEXT_TOKEN_BUDGET when set"""
         if not retrieved_docs:
             return None
         
+        budget = Config.RAG_CONTEXT_TOKEN_BUDGET
         context_parts = []
+        used_tokens = 0
         
-        for i, doc in enumerate(retrieved_docs, 1):
+        for doc in retrieved_docs:
             source = doc['metadata']['source']
             page = doc['metadata']['page']
             text = doc['document']
             
-            context_parts.append(f"[Document {i}]\nSource: {source}, Page: {page}\n{text}\n")
+            part = f"[Document {len(context_parts) + 1}]\nSource: {source}, Page: {page}\n{text}\n"
+            
+            if budget:
+                part_tokens = count_tokens(part) + 1
+                
+                if used_tokens + part_tokens > budget:
+                    # Never send an empty context: trim the best match to fit
+                    if not context_parts:
+                        context_parts.append(truncate_to_tokens(part, budget))
+                        used_tokens = budget
+                    continue
+                
+                used_tokens += part_tokens
+            
+            context_parts.append(part)
+        
+        if budget:
+            self.logger.info(
+                "RAG context packed %s of %s docs into %s/%s tokens",
+                len(context_parts), len(retrieved_docs), used_tokens, budget
+            )
         
         return "\n".join(context_parts)
     
-    def query(self, user_question, conversation_history=None):
+    def query(self, user_question, conversation_history=None, retrieved_docs=None):
         """Answer questions using retrieved documents"""
         self.logger.info("RAG query received")
         
-        retrieved_docs = self.retrieve_documents(user_question)
+        if retrieved_docs is None:
+            retrieved_docs = self.retrieve_documents(user_question)
         
         if not retrieved_docs:
             return "I couldn't find relevant information in the policy documents to answer your question. Please try rephrasing or contact support directly."
@@ -96,10 +122,11 @@ Context from policy documents:
             self.logger.exception("RAG query failed")
             return f"Error generating response: {str(e)}"
 
-    def stream_query(self, user_question, conversation_history=None):
+    def stream_query(self, user_question, conversation_history=None, retrieved_docs=None):
         """Stream answers using retrieved documents."""
         self.logger.info("RAG streaming query received")
-        retrieved_docs = self.retrieve_documents(user_question)
+        if retrieved_docs is None:
+            retrieved_docs = self.retrieve_documents(user_question)
 
         if not retrieved_docs:
             yield "I couldn't find relevant information in the policy documents to answer your question. Please try rephrasing or contact support directly."
@@ -1,18 +1,219 @@
 from openai import OpenAI
 from src.config import Config
+from src.utils.embeddings import encode_query, get_embedding_model
 import json
+import logging
+import re
+import threading
+import numpy as np
+
+ROUTING_EXAMPLES = {
+    "SQL_AGENT": [
+        "Show me customer John's profile",
+        "How many open tickets are there?",
+        "List all premium customers",
+        "What tickets does customer X have?",
+        "How many customers do we have?",
+        "Show me all urgent support tickets",
+        "Which customers have suspended accounts?",
+        "List the 5 most recent support tickets",
+        "How many tickets are in resolved status?",
+        "Show me customers who have more than 3 support tickets"
+    ],
+    "RAG_AGENT": [
+        "What is the refund policy?",
+        "How do I cancel my subscription?",
+        "What information do you collect?",
+        "What are the terms of service?",
+        "How long do refunds take to process?",
+        "How is my personal data protected?",
+        "What are your support hours?",
+        "Can I get a refund after 30 days?"
+    ],
+    "BOTH": [
+        "Show me Emma's tickets and check if she's eligible for refund",
+        "List VIP customers and their refund policy",
+        "Does customer John qualify for a refund under our policy?",
+        "Check the open billing tickets against the refund terms"
+    ]
+}
+
+ROUTING_KEYWORDS = {
+    "SQL_AGENT": [
+        r"\bcustomers?\b",
+        r"\btickets?\b",
+        r"\bhow many\b",
+        r"\bcount\b",
+        r"\blist\b",
+        r"\bshow me\b",
+        r"\bprofile\b",
+        r"\btier\b",
+        r"\b(open|resolved|closed|in progress|urgent)\b",
+        r"\baccount status\b",
+        r"\bemail\b"
+    ],
+    "RAG_AGENT": [
+        r"\bpolic(y|ies)\b",
+        r"\brefunds?\b",
+        r"\bterms\b",
+        r"\bprivacy\b",
+        r"\bcancel",
+        r"\bsubscription\b",
+        r"\bcollect\b",
+        r"\beligib",
+        r"\bprocedures?\b",
+        r"\bhow do i\b",
+        r"\binformation do you\b",
+        r"\bsupport hours\b"
+    ]
+}
+
+class LocalRouter:
+    """Routes obvious queries locally with keyword rules and nearest-centroid embeddings"""
+    
+    def __init__(self, examples=None, keywords=None):
+        self.examples = examples or ROUTING_EXAMPLES
+        self.keywords = {
+            agent: [re.compile(pattern) for pattern in patterns]
+            for agent, patterns in (keywords or ROUTING_KEYWORDS).items()
+        }
+        self._labels = None
+        self._centroids = None
+        self._lock = threading.Lock()
+    
+    def _keyword_hits(self, question):
+        """Count matching keyword rules per agent"""
+        question_lower = question.lower()
+        return {
+            agent: sum(1 for pattern in patterns if pattern.search(question_lower))
+            for agent, patterns in self.keywords.items()
+        }
+    
+    def _load_centroids(self):
+        """Embed the labelled examples once and average them per agent"""
+        if self._centroids is not None:
+            return
+        
+        with self._lock:
+            if self._centroids is not None:
+                return
+            
+            model = get_embedding_model(Config.EMBEDDING_MODEL)
+            labels = list(self.examples.keys())
+            centroids = []
+            
+            for label in labels:
+                embeddings = model.encode(
+                    self.examples[label],
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                )
+                centroid = embeddings.mean(axis=0)
+                centroids.append(centroid / np.linalg.norm(centroid))
+            
+            self._labels = labels
+            self._centroids = np.vstack(centroids).astype(np.float32)
+    
+    def _nearest_centroid(self, question, embedding=None):
+        """Return (agent, similarity, margin) for the closest centroid"""
+        self._load_centroids()
+        
+        if embedding is None:
+            embedding = encode_query(question, Config.EMBEDDING_MODEL)
+        similarities = self._centroids @ embedding
+        
+        order = np.argsort(-similarities)
+        best = float(similarities[order[0]])
+        runner_up = float(similarities[order[1]]) if len(order) > 1 else -1.0
+        
+        return self._labels[order[0]], best, best - runner_up
+    
+    def classify(self, question, embedding=None):
+        """Return a routing decision for high-confidence queries, or None to defer to the LLM"""
+        if not question or not question.strip():
+            return None
+        
+        hits = self._keyword_hits(question)
+        matched = [agent for agent, count in hits.items() if count > 0]
+        rule_agent = matched[0] if len(matched) == 1 else None
+        
+        try:
+            centroid_agent, similarity, margin = self._nearest_centroid(question, embedding)
+        except Exception as e:
+            logging.getLogger(__name__).warning("Centroid routing unavailable: %s", e)
+            centroid_agent, similarity, margin = None, 0.0, 0.0
+        
+        centroid_confident = (
+            centroid_agent is not None
+            and similarity >= Config.ROUTER_CENTROID_THRESHOLD
+            and margin >= Config.ROUTER_CENTROID_MARGIN
+        )
+        
+        if rule_agent:
+            if centroid_confident and centroid_agent != rule_agent:
+                return None
+            if hits[rule_agent] >= Config.ROUTER_KEYWORD_MIN_HITS or centroid_agent == rule_agent:
+                return {
+                    "agent": rule_agent,
+                    "reasoning": f"Local keyword match ({hits[rule_agent]} rules)",
+                    "confidence": "high"
+                }
+            return None
+        
+        if centroid_confident:
+            return {
+                "agent": centroid_agent,
+                "reasoning": f"Local nearest-centroid match (similarity {similarity:.2f})",
+                "confidence": "high"
+            }
+        
+        return None
 
 class RouterAgent:
     """Routes queries to appropriate agent (SQL, RAG, or both)"""
     
     def __init__(self):
+        self.logger = logging.getLogger(__name__)
         if not Config.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not set")
         
         self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.local_router = LocalRouter() if Config.ROUTER_LOCAL_ENABLED else None
+        self.stats = {"local": 0, "llm": 0}
+        self._stats_lock = threading.Lock()
+    
+    def _record(self, path):
+        """Increment the counter for the path that produced a routing decision"""
+        with self._stats_lock:
+            self.stats[path] += 1
     
-    def route(self, user_question):
+    def get_routing_stats(self):
+        """Get local fast-path hit rate and call counts"""
+        with self._stats_lock:
+            local, llm = self.stats["local"], self.stats["llm"]
+        total = local + llm
+        return {
+            "local": local,
+            "llm": llm,
+            "total": total,
+            "local_hit_rate": local / total if total else 0.0
+        }
+    
+    def route(self, user_question, query_embedding=None):
         """Determine which agent should handle the query"""
+        if self.local_router is not None:
+            decision = self.local_router.classify(user_question, query_embedding)
+            if decision:
+                self._record("local")
+                self.logger.info("Local routing: %s (%s)", decision["agent"], decision["reasoning"])
+                return decision
+        
+        self._record("llm")
+        return self.route_with_llm(user_question)
+    
+    def route_with_llm(self, user_question):
+        """Classify the query with a chat completion"""
         
         system_prompt = """You are a routing agent that classifies user queries for a customer support system.
 
@@ -1,6 +1,10 @@
 from openai import OpenAI
 from src.config import Config
 from src.database.sql_db import SQLDatabase
+from src.agents.sql_plan_cache import SQLPlanCache
+from src.agents.sql_formatter import SQLResultFormatter
+from src.utils.tokens import count_tokens
+from collections import Counter
 import json
 import logging
 import time
@@ -16,6 +20,8 @@ class SQLAgent:
         self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
         self.db = SQLDatabase()
         self.schema = self.db.get_schema_info()
+        self.plan_cache = SQLPlanCache() if Config.SQL_PLAN_CACHE_ENABLED else None
+        self.formatter = SQLResultFormatter.from_schema(self.schema) if Config.SQL_TEMPLATE_ANSWERS else None
     
     def get_tools_definition(self):
         """Define SQL query function for OpenAI function calling"""
@@ -57,7 +63,7 @@ Use JOINs to combine data from both tables when needed. Always use proper WHERE
 
         cleaned = text.lstrip()
         decoder = json.JSONDecoder()
-        tool_keys = {"query", "reasoning", "success", "row_count", "results", "error"}
+        tool_keys = {"query", "reasoning", "success", "row_count", "columns", "rows", "results", "error"}
 
         while cleaned:
             try:
@@ -86,7 +92,7 @@ Use JOINs to combine data from both tables when needed. Always use proper WHERE
                         continue
                 except json.JSONDecodeError:
                     pass
-            if any(key in stripped for key in ('"query"', '"results"', '"row_count"', '"success"')):
+            if any(key in stripped for key in ('"query"', '"results"', '"rows"', '"row_count"', '"success"')):
                 continue
             filtered_lines.append(line)
 
@@ -101,13 +107,15 @@ Use JOINs to combine data from both tables when needed. Always use proper WHERE
             self.logger.warning("SQL validation failed in %.2fs: %s", time.perf_counter() - start_time, message)
             return {"error": message, "query": query}
         
-        result = self.db.execute_query(query)
+        result = self.db.fetch(self.db.apply_row_limit(query), max_rows=Config.SQL_MAX_RESULT_ROWS)
         
-        if isinstance(result, dict) and "error" in result:
+        if "error" in result:
             self.logger.error("SQL execution error in %.2fs: %s", time.perf_counter() - start_time, result.get("error"))
-            return result
+            return {**result, "query": query}
 
-        row_count = len(result) if isinstance(result, list) else 0
+        row_count = len(result["rows"])
+        if result["truncated"]:
+            row_count = self.db.count_rows(query)
         self.logger.info("SQL executed in %.2fs (rows: %s)", time.perf_counter() - start_time, row_count)
         
         return {
@@ -115,13 +123,56 @@ Use JOINs to combine data from both tables when needed. Always use proper WHERE
             "query": query,
             "reasoning": reasoning,
             "row_count": row_count,
-            "results": result
+            "truncated": result["truncated"],
+            "columns": result["columns"],
+            "rows": result["rows"]
         }
     
-    def query(self, user_question, conversation_history=None):
-        """Process natural language query using function calling"""
-        self.logger.info("SQL query received")
+    def _summarize_columns(self, columns, rows):
+        """Value counts for low-cardinality columns, used when rows are cut from a result"""
+        summary = {}
+        for index, column in enumerate(columns):
+            counts = Counter(row[index] for row in rows)
+            if 1 < len(counts) <= 10 and all(isinstance(value, str) for value in counts):
+                summary[column] = dict(counts.most_common())
+        return summary
+    
+    def _serialize_tool_result(self, function_response):
+        """Serialize a tool result as compact columnar JSON within the token budget"""
+        text = json.dumps(function_response, default=str, separators=(",", ":"))
+        
+        if not function_response.get("success"):
+            return text
+        
+        rows = function_response["rows"]
+        row_count = function_response["row_count"]
+        if not function_response["truncated"] and count_tokens(text) <= Config.SQL_RESULT_TOKEN_BUDGET:
+            return text
+        
+        summary = self._summarize_columns(function_response["columns"], rows)
+        
+        def render(shown):
+            payload = dict(function_response, rows=rows[:shown])
+            if row_count is None:
+                payload["note"] = f"Showing {shown} rows; more rows not shown"
+            else:
+                payload["note"] = f"Showing {shown} of {row_count} rows; {row_count - shown} more rows not shown"
+            if summary:
+                payload["summary"] = {"over_first_rows": len(rows), "value_counts": summary}
+            return json.dumps(payload, default=str, separators=(",", ":"))
+        
+        low, high = 0, len(rows)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(render(middle)) <= Config.SQL_RESULT_TOKEN_BUDGET:
+                low = middle
+            else:
+                high = middle - 1
         
+        return render(low)
+    
+    def _build_messages(self, user_question, conversation_history=None):
+        """Build the system prompt, history and user message for tool selection"""
         system_prompt = f"""You are a SQL expert assistant for a customer support system. 
 Generate and execute SQL queries to answer questions about customer data and support tickets.
 
@@ -143,49 +194,138 @@ Always use proper JOINs when information spans multiple tables."""
             messages.extend(conversation_history[-Config.MEMORY_WINDOW:])
         
         messages.append({"role": "user", "content": user_question})
+        return messages
+    
+    def _run_tool_calls(self, tool_calls, messages):
+        """Execute requested SQL tool calls, appending results to messages"""
+        executed = []
         
-        try:
-            response = self.client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=messages,
-                tools=self.get_tools_definition(),
-                tool_choice="auto"
-            )
-            self.logger.info("SQL tool selection returned")
+        for tool_call in tool_calls:
+            function_name = tool_call.function.name
             
-            response_message = response.choices[0].message
-            
-            if not response_message.tool_calls:
-                return response_message.content
-            
-            messages.append(response_message)
+            if function_name == "execute_sql_query":
+                function_args = json.loads(tool_call.function.arguments)
+                sql_query = function_args.get("query")
+                reasoning = function_args.get("reasoning")
+                
+                self.logger.info("Executing SQL tool")
+                
+                function_response = self.execute_sql_query(sql_query, reasoning)
+                executed.append(function_response)
+                
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "name": function_name,
+                    "content": self._serialize_tool_result(function_response)
+                })
+        
+        return executed
+    
+    def _remember_plan(self, user_question, conversation_history, executed):
+        """Cache the generated SQL when a single query answered a standalone question"""
+        if self.plan_cache is None or conversation_history or len(executed) != 1:
+            return
+        
+        result = executed[0]
+        if result.get("success"):
+            self.plan_cache.store(user_question, result["query"], result.get("reasoning"))
+    
+    def _cached_plan_messages(self, user_question, conversation_history=None):
+        """Execute a cached SQL plan and return (messages, executed results) for answer formatting"""
+        if self.plan_cache is None or conversation_history:
+            return None, None
+        
+        plan = self.plan_cache.lookup(user_question, validator=self.db.validate_query)
+        if plan is None:
+            return None, None
+        
+        sql_query, reasoning = plan
+        self.logger.info("SQL plan cache hit")
+        
+        function_response = self.execute_sql_query(sql_query, reasoning)
+        if not function_response.get("success"):
+            self.plan_cache.discard(user_question)
+            return None, None
+        
+        messages = self._build_messages(user_question)
+        messages.append({
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": "cached_plan",
+                "type": "function",
+                "function": {
+                    "name": "execute_sql_query",
+                    "arguments": json.dumps({"query": sql_query, "reasoning": reasoning})
+                }
+            }]
+        })
+        messages.append({
+            "role": "tool",
+            "tool_call_id": "cached_plan",
+            "name": "execute_sql_query",
+            "content": self._serialize_tool_result(function_response)
+        })
+        return messages, [function_response]
+    
+    def _template_answer(self, executed):
+        """Format a single small result deterministically, skipping the final completion"""
+        if self.formatter is None or len(executed) != 1 or not executed[0].get("success"):
+            return None
+        
+        result = executed[0]
+        if result["truncated"]:
+            return None
+        
+        answer = self.formatter.format(result["columns"], result["rows"])
+        if answer:
+            self.logger.info("SQL answer formatted from template")
+        return answer
+    
+    def _append_answer_instruction(self, messages):
+        """Ask the model for a user-facing answer after tool results"""
+        messages.append({
+            "role": "system",
+            "content": (
+                "Provide a user-facing answer only. "
+                "Do not include raw JSON, SQL, tool call arguments, or tool outputs."
+            )
+        })
+    
+    def query(self, user_question, conversation_history=None):
+        """Process natural language query using function calling"""
+        self.logger.info("SQL query received")
+        
+        try:
+            messages, executed = self._cached_plan_messages(user_question, conversation_history)
             
-            for tool_call in response_message.tool_calls:
-                function_name = tool_call.function.name
+            if messages is None:
+                messages = self._build_messages(user_question, conversation_history)
                 
-                if function_name == "execute_sql_query":
-                    function_args = json.loads(tool_call.function.arguments)
-                    sql_query = function_args.get("query")
-                    reasoning = function_args.get("reasoning")
-
-                    self.logger.info("Executing SQL tool")
-                    
-                    function_response = self.execute_sql_query(sql_query, reasoning)
-                    
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": function_name,
-                        "content": json.dumps(function_response)
-                    })
-
-            messages.append({
-                "role": "system",
-                "content": (
-                    "Provide a user-facing answer only. "
-                    "Do not include raw JSON, SQL, tool call arguments, or tool outputs."
+                response = self.client.chat.completions.create(
+                    model=Config.OPENAI_MODEL,
+                    messages=messages,
+                    tools=self.get_tools_definition(),
+                    tool_choice="auto"
                 )
-            })
+                self.logger.info("SQL tool selection returned")
+                
+                response_message = response.choices[0].message
+                
+                if not response_message.tool_calls:
+                    return response_message.content
+                
+                messages.append(response_message)
+                
+                executed = self._run_tool_calls(response_message.tool_calls, messages)
+                self._remember_plan(user_question, conversation_history, executed)
+            
+            answer = self._template_answer(executed)
+            if answer:
+                return answer
+            
+            self._append_answer_instruction(messages)
             
             final_response = self.client.chat.completions.create(
                 model=Config.OPENAI_MODEL,
@@ -205,73 +345,39 @@ Always use proper JOINs when information spans multiple tables."""
         self.logger.info("SQL streaming query received")
         yield "Working on it..."
 
-        system_prompt = f"""You are a SQL expert assistant for a customer support system. 
-Generate and execute SQL queries to answer questions about customer data and support tickets.
-
-Database Schema:
-{json.dumps(self.schema, indent=2)}
-
-When answering:
-1. Use the execute_sql_query function to get data
-2. Format results in a clear, user-friendly way
-3. If multiple rows are returned, summarize key information
-4. Include relevant details like customer names, ticket IDs, dates
-5. If no results found, explain that clearly
-
-Always use proper JOINs when information spans multiple tables."""
-
-        messages = [{"role": "system", "content": system_prompt}]
-
-        if conversation_history:
-            messages.extend(conversation_history[-Config.MEMORY_WINDOW:])
-
-        messages.append({"role": "user", "content": user_question})
-
         try:
-            response = self.client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=messages,
-                tools=self.get_tools_definition(),
-                tool_choice="auto"
-            )
-            self.logger.info("SQL streaming tool selection returned")
+            messages, executed = self._cached_plan_messages(user_question, conversation_history)
 
-            response_message = response.choices[0].message
+            if messages is None:
+                messages = self._build_messages(user_question, conversation_history)
 
-            if not response_message.tool_calls:
-                content = self._strip_tool_json_prefix(response_message.content or "")
-                if content:
-                    yield content
-                return
-
-            messages.append(response_message)
+                response = self.client.chat.completions.create(
+                    model=Config.OPENAI_MODEL,
+                    messages=messages,
+                    tools=self.get_tools_definition(),
+                    tool_choice="auto"
+                )
+                self.logger.info("SQL streaming tool selection returned")
 
-            for tool_call in response_message.tool_calls:
-                function_name = tool_call.function.name
+                response_message = response.choices[0].message
 
-                if function_name == "execute_sql_query":
-                    function_args = json.loads(tool_call.function.arguments)
-                    sql_query = function_args.get("query")
-                    reasoning = function_args.get("reasoning")
+                if not response_message.tool_calls:
+                    content = self._strip_tool_json_prefix(response_message.content or "")
+                    if content:
+                        yield content
+                    return
 
-                    self.logger.info("SQL streaming executing tool")
+                messages.append(response_message)
 
-                    function_response = self.execute_sql_query(sql_query, reasoning)
+                executed = self._run_tool_calls(response_message.tool_calls, messages)
+                self._remember_plan(user_question, conversation_history, executed)
 
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": function_name,
-                        "content": json.dumps(function_response)
-                    })
+            answer = self._template_answer(executed)
+            if answer:
+                yield answer
+                return
 
-            messages.append({
-                "role": "system",
-                "content": (
-                    "Provide a user-facing answer only. "
-                    "Do not include raw JSON, SQL, tool call arguments, or tool outputs."
-                )
-            })
+            self._append_answer_instruction(messages)
 
             stream = self.client.chat.completions.create(
                 model=Config.OPENAI_MODEL,
@@ -0,0 +1,80 @@
+import re
+from src.config import Config
+
+def _humanize(column):
+    """Turn a column name like first_name or COUNT(*) into a readable label"""
+    label = re.sub(r"[^0-9a-zA-Z]+", " ", column).strip()
+    return label.title() if label else column
+
+def _cell(value):
+    """Render a value for markdown output"""
+    if value is None:
+        return "—"
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+def _is_count_column(column):
+    """Whether a column is a COUNT(...) expression or a count alias such as ticket_count"""
+    return bool(re.match(r"count\s*\(|(?:\w+_)?count$|num_\w+$|number_of_\w+$", column.strip().lower()))
+
+def _number(value):
+    """Render a numeric value, rounding floats to two decimals"""
+    if isinstance(value, float):
+        return f"{value:,.2f}".rstrip("0").rstrip(".")
+    return str(value)
+
+class SQLResultFormatter:
+    """Deterministic markdown answers for small SQL results"""
+    
+    def __init__(self, known_columns, max_rows=None, max_columns=None):
+        self.known_columns = {column.lower() for column in known_columns}
+        self.max_rows = max_rows or Config.SQL_TEMPLATE_MAX_ROWS
+        self.max_columns = max_columns or Config.SQL_TEMPLATE_MAX_COLUMNS
+    
+    @classmethod
+    def from_schema(cls, schema):
+        """Build a formatter that recognises the columns described in get_schema_info"""
+        columns = [
+            column.split(" ", 1)[0]
+            for table in schema.values()
+            for column in table.get("columns", [])
+        ]
+        return cls(columns)
+    
+    def format(self, columns, rows):
+        """Return a markdown answer when the result shape matches a template, else None"""
+        if not columns:
+            return None
+        
+        if not rows:
+            return "No matching records were found."
+        
+        if len(rows) == 1 and len(columns) == 1 and isinstance(rows[0][0], (int, float)):
+            return self._format_scalar(columns[0], rows[0][0])
+        
+        if not all(column.lower() in self.known_columns for column in columns):
+            return None
+        
+        if len(rows) == 1:
+            return self._format_record(columns, rows[0])
+        
+        if len(rows) <= self.max_rows and len(columns) <= self.max_columns:
+            return self._format_table(columns, rows)
+        
+        return None
+    
+    def _format_scalar(self, column, value):
+        # Only integer counts read as a record count; sums, averages and ratios keep their label
+        if isinstance(value, int) and _is_count_column(column):
+            noun = "record" if value == 1 else "records"
+            return f"There {'is' if value == 1 else 'are'} **{value}** matching {noun}."
+        return f"**{_humanize(column)}:** {_number(value)}"
+    
+    def _format_record(self, columns, row):
+        lines = [f"- **{_humanize(column)}:** {_cell(value)}" for column, value in zip(columns, row)]
+        return "\n".join(lines)
+    
+    def _format_table(self, columns, rows):
+        header = "| " + " | ".join(_humanize(column) for column in columns) + " |"
+        divider = "| " + " | ".join("---" for _ in columns) + " |"
+        body = ["| " + " | ".join(_cell(value) for value in row) + " |" for row in rows]
+        return "\n".join([f"Found {len(rows)} records:", "", header, divider, *body])
@@ -0,0 +1,196 @@
+from collections import OrderedDict
+import re
+import threading
+from src.config import Config
+
+class SQLPlanCache:
+    """LRU cache mapping templated questions to parameterised SQL plans"""
+    
+    _QUOTED = re.compile(r"\"([^\"]+)\"|'([^']+)'")
+    _NUMBER = re.compile(r"\b\d+\b")
+    _NAME = re.compile(r"\b[A-Z][a-z]+\b")
+    _STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+    _SLOT = re.compile(r"\{\{(\w+)(?:\|(lower|upper))?\}\}")
+    # Capitalised words are only refillable when the SQL compares them against a person's name or email
+    _NAME_COLUMN = re.compile(
+        r"\b(?:\w+\.)?(?:first_name|last_name|email)\s*\)?\s*(?:=|==|!=|<>|\bLIKE\b|\bIN\s*\()\s*$",
+        re.IGNORECASE
+    )
+    _NAME_STOPWORDS = {
+        "I", "What", "Which", "Who", "How", "Show", "List", "Give", "Get", "Find",
+        "Tell", "Are", "Is", "Do", "Does", "Can", "The", "And", "Or", "Me", "My"
+    }
+    
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or Config.SQL_PLAN_CACHE_MAX_ENTRIES
+        self.plans = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "rejected": 0, "discarded": 0}
+        self._lock = threading.Lock()
+    
+    def _extract_slots(self, question):
+        """Replace entity values in a question with typed slot names"""
+        slots = {}
+        counters = {"STR": 0, "NUM": 0, "NAME": 0}
+        
+        def add_slot(kind, value):
+            name = f"{kind}{counters[kind]}"
+            counters[kind] += 1
+            slots[name] = value
+            return f" {{{{{name}}}}} "
+        
+        template = self._QUOTED.sub(lambda m: add_slot("STR", m.group(1) or m.group(2)), question)
+        template = self._NUMBER.sub(lambda m: add_slot("NUM", m.group(0)), template)
+        
+        def replace_name(match):
+            value = match.group(0)
+            if value in self._NAME_STOPWORDS:
+                return value
+            return add_slot("NAME", value)
+        
+        parts = re.split(r"(\{\{\w+\}\})", template)
+        for i in range(0, len(parts), 2):
+            segment = parts[i]
+            if i == 0:
+                segment = re.sub(r"^\s*[A-Z][a-z]+", lambda m: m.group(0).lower(), segment, count=1)
+            parts[i] = self._NAME.sub(replace_name, segment)
+        template = "".join(parts)
+        
+        key = re.sub(r"[^\w{}]+", " ", template.lower().replace("'s", "")).strip()
+        key = re.sub(r"\s+", " ", key)
+        return key, slots
+    
+    def _templatize_sql(self, sql, slots):
+        """Replace slot values in SQL with markers, returning (template, fixed NAME slots) or None"""
+        parts = self._STRING_LITERAL.split(sql)
+        fixed = {}
+        
+        for name, value in slots.items():
+            placed = 0
+            
+            for i, part in enumerate(parts):
+                is_literal = i % 2 == 1
+                
+                if name.startswith("NUM"):
+                    if is_literal:
+                        continue
+                    new_part, count = re.subn(rf"\b{re.escape(value)}\b", f"{{{{{name}}}}}", part)
+                else:
+                    if not is_literal:
+                        continue
+                    new_part, count = re.subn(re.escape(value), f"{{{{{name}}}}}", part)
+                    if count == 0 and value.lower() != value:
+                        new_part, count = re.subn(re.escape(value.lower()), f"{{{{{name}|lower}}}}", part)
+                
+                if not count:
+                    continue
+                
+                # Any other capitalised word (a tier, status, priority...) stays literal and becomes part of the key
+                if name.startswith("NAME") and not self._NAME_COLUMN.search(parts[i - 1]):
+                    fixed[name] = value.lower()
+                    break
+                
+                parts[i] = new_part
+                placed += count
+            
+            if name in fixed:
+                continue
+            
+            # A value used twice (LIMIT 3 OFFSET 3) cannot tell which occurrence the slot belongs to
+            if placed != 1:
+                return None
+        
+        return "".join(parts), fixed
+    
+    def _find(self, key, slots):
+        """Return the cache key of the plan for a templated question whose fixed words match, or None"""
+        for cache_key, plan in self.plans.items():
+            if cache_key[0] != key or plan["slots"] != sorted(slots):
+                continue
+            if all(slots[name].lower() == value for name, value in plan["fixed"].items()):
+                return cache_key
+        return None
+    
+    def _fill(self, template_sql, slots):
+        """Substitute slot values back into a SQL template"""
+        def replace(match):
+            value = slots[match.group(1)]
+            if match.group(2) == "lower":
+                value = value.lower()
+            elif match.group(2) == "upper":
+                value = value.upper()
+            return value.replace("'", "''")
+        
+        return self._SLOT.sub(replace, template_sql)
+    
+    def lookup(self, question, validator=None):
+        """Return (sql, reasoning) for a cached plan matching the question, or None"""
+        key, slots = self._extract_slots(question)
+        
+        with self._lock:
+            cache_key = self._find(key, slots)
+            if cache_key is None:
+                self.stats["misses"] += 1
+                return None
+            self.plans.move_to_end(cache_key)
+            plan = self.plans[cache_key]
+        
+        sql = self._fill(plan["sql"], slots)
+        
+        if validator is not None:
+            is_valid, _ = validator(sql)
+            if not is_valid:
+                self.discard(question)
+                with self._lock:
+                    self.stats["misses"] += 1
+                return None
+        
+        with self._lock:
+            self.stats["hits"] += 1
+        return sql, plan["reasoning"]
+    
+    def store(self, question, sql, reasoning=None):
+        """Cache the SQL generated for a question if its entities can be parameterised"""
+        if "{{" in sql:
+            return False
+        
+        key, slots = self._extract_slots(question)
+        template = self._templatize_sql(sql, slots)
+        
+        with self._lock:
+            if template is None:
+                self.stats["rejected"] += 1
+                return False
+            
+            template_sql, fixed = template
+            cache_key = (key, tuple(sorted(fixed.items())))
+            self.plans[cache_key] = {
+                "sql": template_sql,
+                "slots": sorted(slots),
+                "fixed": fixed,
+                "reasoning": reasoning
+            }
+            self.plans.move_to_end(cache_key)
+            self.stats["stores"] += 1
+            
+            while len(self.plans) > self.max_entries:
+                self.plans.popitem(last=False)
+        
+        return True
+    
+    def discard(self, question):
+        """Drop the cached plan for a question"""
+        key, slots = self._extract_slots(question)
+        with self._lock:
+            cache_key = self._find(key, slots)
+            if cache_key is not None:
+                del self.plans[cache_key]
+                self.stats["discarded"] += 1
+    
+    def get_stats(self):
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["plans"] = len(self.plans)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -12,13 +12,78 @@ class Config:
     DATABASE_PATH = os.getenv("DATABASE_PATH", "./data/database/customer_support.db")
     VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "./vectorstore/lance_db")
     
+    SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", 4))
+    SQLITE_POOL_TIMEOUT = float(os.getenv("SQLITE_POOL_TIMEOUT", 10))
+    SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", 5))
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 16384))
+    SQLITE_MEMORY_REPLICA = os.getenv("SQLITE_MEMORY_REPLICA", "false").lower() == "true"
+    SQLITE_REPLICA_REFRESH_INTERVAL = float(os.getenv("SQLITE_REPLICA_REFRESH_INTERVAL", 2))
+    SQL_RESULT_CACHE_ENABLED = os.getenv("SQL_RESULT_CACHE_ENABLED", "true").lower() == "true"
+    SQL_RESULT_CACHE_MAX_BYTES = int(os.getenv("SQL_RESULT_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+    SQL_QUERY_TIMEOUT = float(os.getenv("SQL_QUERY_TIMEOUT", 5))
+    SQL_MAX_VM_STEPS = int(os.getenv("SQL_MAX_VM_STEPS", 50_000_000))
+    SQL_PROGRESS_INTERVAL = int(os.getenv("SQL_PROGRESS_INTERVAL", 10_000))
+    SQL_AUTO_LIMIT = int(os.getenv("SQL_AUTO_LIMIT", 1000))
+    SQL_FETCH_BATCH_SIZE = int(os.getenv("SQL_FETCH_BATCH_SIZE", 100))
+    SQL_MAX_RESULT_ROWS = int(os.getenv("SQL_MAX_RESULT_ROWS", 200))
+    SQL_RESULT_TOKEN_BUDGET = int(os.getenv("SQL_RESULT_TOKEN_BUDGET", 3000))
+    SQL_PLAN_CACHE_ENABLED = os.getenv("SQL_PLAN_CACHE_ENABLED", "true").lower() == "true"
+    SQL_PLAN_CACHE_MAX_ENTRIES = int(os.getenv("SQL_PLAN_CACHE_MAX_ENTRIES", 500))
+    SQL_TEMPLATE_ANSWERS = os.getenv("SQL_TEMPLATE_ANSWERS", "true").lower() == "true"
+    SQL_TEMPLATE_MAX_ROWS = int(os.getenv("SQL_TEMPLATE_MAX_ROWS", 10))
+    SQL_TEMPLATE_MAX_COLUMNS = int(os.getenv("SQL_TEMPLATE_MAX_COLUMNS", 6))
+    QUERY_PLAN_CAPTURE = os.getenv("QUERY_PLAN_CAPTURE", "true").lower() == "true"
+    QUERY_PLAN_LOG_PATH = os.getenv("QUERY_PLAN_LOG_PATH", "./data/database/query_plans.jsonl")
+    QUERY_PLAN_LOG_MAX_BYTES = int(os.getenv("QUERY_PLAN_LOG_MAX_BYTES", 5 * 1024 * 1024))
+    
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 1000))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 200))
+    CHUNK_UNIT = os.getenv("CHUNK_UNIT", "chars")
+    CHUNK_SIZE_TOKENS = int(os.getenv("CHUNK_SIZE_TOKENS", 256))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 48))
+    TOKEN_LENGTH_CACHE_SIZE = int(os.getenv("TOKEN_LENGTH_CACHE_SIZE", 65536))
+    PDF_PROCESS_WORKERS = int(os.getenv("PDF_PROCESS_WORKERS", 0))
+    PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 50))
+    PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", 30))
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 256))
+    INGEST_QUEUE_BATCHES = int(os.getenv("INGEST_QUEUE_BATCHES", 4))
+    INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", "./data/ingest_manifest.json")
     
     TOP_K_RETRIEVAL = int(os.getenv("TOP_K_RETRIEVAL", 4))
+    RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", 0))
+    RAG_BUDGET_CANDIDATES = int(os.getenv("RAG_BUDGET_CANDIDATES", 20))
     MEMORY_WINDOW = int(os.getenv("MEMORY_WINDOW", 5))
     
     EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache")
+    
+    VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "IVF_PQ")
+    VECTOR_INDEX_METRIC = os.getenv("VECTOR_INDEX_METRIC", "l2")
+    VECTOR_INDEX_MIN_ROWS = int(os.getenv("VECTOR_INDEX_MIN_ROWS", 5000))
+    VECTOR_INDEX_REBUILD_ROWS = int(os.getenv("VECTOR_INDEX_REBUILD_ROWS", 2000))
+    VECTOR_INDEX_PARTITIONS = int(os.getenv("VECTOR_INDEX_PARTITIONS", 0))
+    VECTOR_INDEX_SUB_VECTORS = int(os.getenv("VECTOR_INDEX_SUB_VECTORS", 0))
+    VECTOR_SEARCH_NPROBES = int(os.getenv("VECTOR_SEARCH_NPROBES", 20))
+    VECTOR_SEARCH_REFINE_FACTOR = int(os.getenv("VECTOR_SEARCH_REFINE_FACTOR", 10))
+    
+    TEMP_INDEX_MAX_MB = int(os.getenv("TEMP_INDEX_MAX_MB", 64))
+    
+    AGENT_MAX_WORKERS = int(os.getenv("AGENT_MAX_WORKERS", 8))
+    SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+    
+    ROUTER_LOCAL_ENABLED = os.getenv("ROUTER_LOCAL_ENABLED", "true").lower() == "true"
+    ROUTER_KEYWORD_MIN_HITS = int(os.getenv("ROUTER_KEYWORD_MIN_HITS", 2))
+    ROUTER_CENTROID_THRESHOLD = float(os.getenv("ROUTER_CENTROID_THRESHOLD", 0.55))
+    ROUTER_CENTROID_MARGIN = float(os.getenv("ROUTER_CENTROID_MARGIN", 0.08))
+    
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.92))
+    ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 500))
 
     LOGGING_ENABLED = os.getenv("LOGGING_ENABLED", "true").lower() == "true"
     _LOG_LEVEL_RAW = os.getenv("LOGGING_LEVEL", "INFO").upper()
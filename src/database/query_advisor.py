@@ -0,0 +1,211 @@
+from collections import Counter, defaultdict
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from src.config import Config
+
+# SCAN ... USING [COVERING] INDEX still walks every row, so only virtual tables are excluded
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(?!CONSTANT ROW|SUBQUERY\b)(\w+)(?: AS \w+)?(?!.*\bVIRTUAL TABLE\b)")
+_SEARCH = re.compile(r"^SEARCH (?:TABLE )?(\w+)")
+_PREDICATE = re.compile(
+    r"(?:\b\w+\.)?\b(\w+)\s*(=|==|!=|<>|<=|>=|<|>|\bIN\b|\bBETWEEN\b|\bLIKE\b|\bIS\b)",
+    re.IGNORECASE
+)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|\)|$)", re.IGNORECASE | re.DOTALL)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_EQUALITY_OPS = {"=", "==", "IN", "IS"}
+_NOT_ALIASES = (
+    "where", "join", "inner", "left", "right", "full", "cross", "natural", "on", "using",
+    "group", "order", "limit", "having", "union", "except", "intersect", "window"
+)
+_TABLE_ALIAS = re.compile(
+    rf"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!(?:{'|'.join(_NOT_ALIASES)})\b)(\w+))?",
+    re.IGNORECASE
+)
+
+def normalize_query(query):
+    """Collapse whitespace and replace literals with ? so logged queries carry no customer data"""
+    text = _NUMBER_LITERAL.sub("?", _STRING_LITERAL.sub("?", query))
+    return " ".join(text.split())
+
+def table_aliases(query):
+    """Map the aliases used in FROM and JOIN clauses to their table names"""
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(_STRING_LITERAL.sub("?", query)):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+def extract_columns(query):
+    """Return (equality columns, range columns, order columns) referenced by a query"""
+    text = _STRING_LITERAL.sub("?", query)
+    equality, ranged = [], []
+    
+    for column, op in _PREDICATE.findall(text):
+        target = equality if op.upper() in _EQUALITY_OPS else ranged
+        if column.lower() not in target:
+            target.append(column.lower())
+    
+    order = []
+    for clause in _ORDER_BY.findall(text):
+        for term in clause.split(","):
+            match = re.match(r"\s*(?:\w+\.)?(\w+)", term)
+            if match and match.group(1).lower() not in order:
+                order.append(match.group(1).lower())
+    
+    return equality, ranged, order
+
+class QueryPlanRecorder:
+    """Captures EXPLAIN QUERY PLAN output and aggregates full-table-scan and sort patterns"""
+    
+    def __init__(self, log_path=None):
+        self.logger = logging.getLogger(__name__)
+        self.log_path = log_path or Config.QUERY_PLAN_LOG_PATH
+        self.max_bytes = Config.QUERY_PLAN_LOG_MAX_BYTES
+        self.scan_patterns = Counter()
+        self._lock = threading.Lock()
+    
+    def capture(self, conn, query, params=None):
+        """Explain a query on the given connection, log the plan and record table access"""
+        try:
+            cursor = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ())
+            details = [row[3] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.debug("EXPLAIN QUERY PLAN failed: %s", e)
+            return None
+        
+        normalized = normalize_query(query)
+        self.logger.debug("Query plan for %s: %s", normalized, " | ".join(details))
+        
+        aliases = table_aliases(query)
+        scans = sorted({aliases.get(m.group(1), m.group(1)) for m in map(_SCAN.match, details) if m})
+        searches = sorted({aliases.get(m.group(1), m.group(1)) for m in map(_SEARCH.match, details) if m})
+        temp_sort = any("USE TEMP B-TREE" in detail for detail in details)
+        equality, ranged, order = extract_columns(query)
+        
+        observation = {
+            "query": normalized,
+            "plan": details,
+            "scans": scans,
+            "searches": searches,
+            "temp_sort": temp_sort,
+            "equality_columns": equality,
+            "range_columns": ranged,
+            "order_columns": order
+        }
+        
+        with self._lock:
+            for table in scans:
+                self.scan_patterns[(table, tuple(equality), tuple(ranged), tuple(order))] += 1
+            self._append(observation)
+        
+        return observation
+    
+    def _append(self, observation):
+        """Append an observation to the JSONL plan log, rotating it to .1 once it exceeds max_bytes"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            if self.max_bytes and os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= self.max_bytes:
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(observation) + "\n")
+        except OSError as e:
+            self.logger.warning("Could not write query plan log: %s", e)
+
+def load_observations(log_path=None):
+    """Read recorded query plan observations, including the rotated log"""
+    log_path = log_path or Config.QUERY_PLAN_LOG_PATH
+    
+    observations = []
+    for path in (log_path + ".1", log_path):
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        observations.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+    return observations
+
+def _table_columns(conn, table):
+    return {row[1].lower() for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def _existing_index_prefixes(conn, table):
+    prefixes = [
+        (row[1].lower(),) for row in conn.execute(f"PRAGMA table_info({table})")
+        if row[5] == 1 and row[2].upper() == "INTEGER"
+    ]
+    for index in conn.execute(f"PRAGMA index_list({table})"):
+        columns = [row[2].lower() for row in conn.execute(f"PRAGMA index_info({index[1]})") if row[2]]
+        prefixes.append(tuple(columns))
+    return prefixes
+
+def _candidate_columns(observation, columns, max_columns):
+    """Equality columns first, then one range or ORDER BY column for this table"""
+    leading = [c for c in observation.get("equality_columns", []) if c in columns]
+    order = [c for c in observation.get("order_columns", []) if c in columns and c not in leading]
+    ranged = [c for c in observation.get("range_columns", []) if c in columns and c not in leading]
+    
+    trailing = order if observation.get("temp_sort") and order else ranged or order
+    return tuple(leading[:max_columns - 1] + trailing[:1]) if trailing else tuple(leading[:max_columns])
+
+def recommend_indexes(conn, observations, min_count=1, max_columns=3):
+    """Suggest composite indexes for full scans and partially indexed lookups in recorded traffic"""
+    candidates = defaultdict(lambda: {"count": 0, "full_scans": 0, "queries": Counter()})
+    schema = {}
+    
+    for observation in observations:
+        full_scans = set(observation.get("scans", []))
+        tables = full_scans | set(observation.get("searches", []))
+        
+        for table in tables:
+            if table not in schema:
+                try:
+                    schema[table] = (_table_columns(conn, table), _existing_index_prefixes(conn, table))
+                except sqlite3.Error:
+                    schema[table] = (set(), [])
+            
+            columns, existing = schema[table]
+            index_columns = _candidate_columns(observation, columns, max_columns)
+            
+            if not index_columns:
+                continue
+            if any(prefix[:len(index_columns)] == index_columns for prefix in existing):
+                continue
+            
+            stats = candidates[(table, index_columns)]
+            stats["count"] += 1
+            stats["full_scans"] += table in full_scans
+            stats["queries"][observation["query"]] += 1
+    
+    recommendations = []
+    for (table, index_columns), stats in candidates.items():
+        if stats["count"] < min_count:
+            continue
+        
+        # A longer candidate on the same table already serves this prefix
+        if any(
+            other != index_columns and other_table == table and other[:len(index_columns)] == index_columns
+            for other_table, other in candidates
+        ):
+            continue
+        
+        name = f"idx_{table}_{'_'.join(index_columns)}"
+        recommendations.append({
+            "table": table,
+            "columns": list(index_columns),
+            "queries": stats["count"],
+            "full_scans": stats["full_scans"],
+            "example_query": stats["queries"].most_common(1)[0][0],
+            "sql": f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(index_columns)})"
+        })
+    
+    return sorted(recommendations, key=lambda r: (r["full_scans"], r["queries"]), reverse=True)
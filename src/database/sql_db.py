@@ -1,53 +1,470 @@
 import sqlite3
 import re
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
 from src.config import Config
+from src.database.query_advisor import QueryPlanRecorder
 import json
 
-class SQLDatabase:
-    """SQLite database connector for customer support data"""
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION}
+if hasattr(sqlite3, "SQLITE_RECURSIVE"):
+    _ALLOWED_ACTIONS.add(sqlite3.SQLITE_RECURSIVE)
+
+def _read_only_authorizer(action, arg1, arg2, db_name, trigger_name):
+    """Allow only reads; pragmas may be queried but never set"""
+    if action in _ALLOWED_ACTIONS:
+        return sqlite3.SQLITE_OK
+    if action == sqlite3.SQLITE_PRAGMA and arg2 is None:
+        return sqlite3.SQLITE_OK
+    # SQLite reports a sqlite_master update while connecting virtual tables such as FTS5;
+    # real writes are still blocked by mode=ro and query_only
+    if action == sqlite3.SQLITE_UPDATE and arg1 == "sqlite_master" and trigger_name is None:
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a query runs past its wall-clock or VM-step budget"""
+
+class ConnectionPool:
+    """Thread-safe pool of read-only SQLite connections with tuned pragmas"""
     
-    def __init__(self):
-        self.db_path = Config.DATABASE_PATH
+    def __init__(self, db_path, size=None, uri=None):
+        self.db_path = db_path
+        self.uri = uri
+        self.size = size or Config.SQLITE_POOL_SIZE
+        self.closed = False
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._journal_checked = False
+        self._lock = threading.Lock()
     
-    def get_connection(self):
-        """Get database connection"""
+    def _ensure_journal_mode(self):
+        """Switch the database to the configured journal mode once per pool"""
+        with self._lock:
+            if self._journal_checked or self.uri or not Config.SQLITE_JOURNAL_MODE:
+                return
+            self._journal_checked = True
+            
+            if not os.path.exists(self.db_path):
+                return
+            
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=Config.SQLITE_BUSY_TIMEOUT)
+                try:
+                    conn.execute(f"PRAGMA journal_mode = {Config.SQLITE_JOURNAL_MODE}")
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                print(f"Could not set journal mode on {self.db_path}: {e}")
+    
+    def _connect(self):
+        """Open a read-only connection and apply pragmas once"""
+        self._ensure_journal_mode()
+        
+        uri = self.uri or f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=Config.SQLITE_BUSY_TIMEOUT,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {int(Config.SQLITE_MMAP_SIZE)}")
+        conn.execute(f"PRAGMA cache_size = {-int(Config.SQLITE_CACHE_SIZE_KB)}")
+        conn.execute("PRAGMA query_only = 1")
+        conn.set_authorizer(_read_only_authorizer)
+        return conn
+    
+    @contextmanager
+    def connection(self):
+        """Check out a connection for exclusive use by the calling thread"""
+        if not self._slots.acquire(timeout=Config.SQLITE_POOL_TIMEOUT):
+            raise sqlite3.OperationalError("Timed out waiting for a database connection")
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            return conn
-        except Exception as e:
-            print(f"Error connecting to database: {e}")
-            return None
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            
+            try:
+                yield conn
+            finally:
+                if self.closed:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+        finally:
+            self._slots.release()
     
-    def execute_query(self, query, params=None):
-        """Execute SELECT query and return results"""
-        conn = self.get_connection()
-        if not conn:
-            return {"error": "Database connection failed"}
+    def close_all(self):
+        """Close every idle connection; connections still checked out close on return"""
+        self.closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+class MemoryReplica:
+    """Serves reads from a shared in-memory copy of the database, reloaded when the file changes"""
+    
+    def __init__(self, db_path, version_fn):
+        self.db_path = db_path
+        self.version_fn = version_fn
+        self.pool = None
+        self.generation = 0
+        self.loaded_at = None
+        self._anchor = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        """Copy the database file into a new in-memory generation and swap pools"""
+        version = self.version_fn()
+        generation = self.generation + 1
+        uri = f"file:customer_support_replica_{id(self)}_{generation}?mode=memory&cache=shared"
+        
+        # The anchor connection keeps the shared in-memory database alive
+        anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            source = sqlite3.connect(f"{Path(self.db_path).resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                source.backup(anchor)
+            finally:
+                source.close()
+        except sqlite3.Error:
+            anchor.close()
+            raise
+        
+        old_pool, old_anchor = self.pool, self._anchor
+        self.pool = ConnectionPool(self.db_path, uri=uri)
+        self._anchor = anchor
+        self._version = version
+        self.generation = generation
+        self.loaded_at = time.time()
+        
+        if old_pool is not None:
+            old_pool.close_all()
+            old_anchor.close()
+        
+        print(f"Loaded in-memory replica of {self.db_path} (generation {generation})")
+    
+    def refresh_if_stale(self):
+        """Reload the replica if the database changed, checking at most once per interval"""
+        now = time.monotonic()
+        if self.pool is not None and now - self._checked_at < Config.SQLITE_REPLICA_REFRESH_INTERVAL:
+            return
         
-        cursor = conn.cursor()
+        # Readers keep using the current generation while another thread reloads
+        if not self._lock.acquire(blocking=self.pool is None):
+            return
         
         try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
+            if self.pool is not None and now - self._checked_at < Config.SQLITE_REPLICA_REFRESH_INTERVAL:
+                return
+            self._checked_at = now
             
-            results = cursor.fetchall()
+            if self.pool is None or self.version_fn() != self._version:
+                try:
+                    self._load()
+                except sqlite3.Error as e:
+                    print(f"Error loading in-memory replica: {e}")
+                    if self.pool is None:
+                        raise
+        finally:
+            self._lock.release()
+    
+    @contextmanager
+    def connection(self):
+        """Check out a connection to the current in-memory generation"""
+        self.refresh_if_stale()
+        with self.pool.connection() as conn:
+            yield conn
+    
+    def close_all(self):
+        """Close the current generation"""
+        with self._lock:
+            if self.pool is not None:
+                self.pool.close_all()
+                self._anchor.close()
+                self.pool = None
+                self._anchor = None
+    
+    def get_stats(self):
+        """Get replica generation and load time"""
+        return {"enabled": True, "generation": self.generation, "loaded_at": self.loaded_at}
+
+class QueryResultCache:
+    """Byte-bounded LRU cache of SELECT results keyed by normalised SQL"""
+    
+    _STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+    
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or Config.SQL_RESULT_CACHE_MAX_BYTES
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def normalize(cls, query):
+        """Lowercase and collapse whitespace outside string literals"""
+        parts = cls._STRING_LITERAL.split(query.strip().rstrip(';').strip())
+        for i in range(0, len(parts), 2):
+            parts[i] = re.sub(r"\s+", " ", parts[i].lower())
+        return "".join(parts).strip()
+    
+    @classmethod
+    def make_key(cls, query, params=None):
+        """Build a hashable cache key from SQL text and parameters"""
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        elif params is not None:
+            params = tuple(params)
+        return cls.normalize(query), params
+    
+    def get(self, key, version):
+        """Return cached rows for a key if they match the current data version"""
+        with self._lock:
+            entry = self.entries.get(key)
             
-            if not results:
-                return []
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
             
-            columns = [description[0] for description in cursor.description]
-            result_dicts = [dict(zip(columns, row)) for row in results]
+            if entry["version"] != version:
+                self._remove(key)
+                self.stats["invalidations"] += 1
+                self.stats["misses"] += 1
+                return None
             
-            return result_dicts
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry["rows"]
+    
+    def put(self, key, version, rows):
+        """Cache rows, evicting least recently used entries past the byte budget"""
+        size = len(json.dumps(rows, default=str)) + len(key[0])
+        if size > self.max_bytes:
+            return
         
-        except sqlite3.Error as e:
-            return {"error": f"SQL execution error: {str(e)}"}
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            
+            self.entries[key] = {"version": version, "rows": rows, "size": size}
+            self.total_bytes += size
+            
+            while self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+    
+    def _remove(self, key):
+        """Remove an entry and release its bytes"""
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry["size"]
+    
+    def get_stats(self):
+        """Get hit ratio, counters and current size"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+            stats["bytes"] = self.total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+class SQLDatabase:
+    """SQLite database connector for customer support data"""
+    
+    def __init__(self):
+        self.db_path = Config.DATABASE_PATH
+        self.replica = MemoryReplica(self.db_path, self._cache_version) if Config.SQLITE_MEMORY_REPLICA else None
+        self.pool = self.replica or ConnectionPool(self.db_path)
+        self.result_cache = QueryResultCache() if Config.SQL_RESULT_CACHE_ENABLED else None
+        self.plan_recorder = QueryPlanRecorder() if Config.QUERY_PLAN_CAPTURE else None
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+    
+    def _pragma_data_version(self):
+        """Read PRAGMA data_version from a dedicated long-lived connection"""
+        with self._version_lock:
+            try:
+                if self._version_conn is None:
+                    uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+                    self._version_conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                self._version_conn = None
+                return None
+    
+    def get_data_version(self):
+        """Get a token that changes whenever the database files are written"""
+        version = []
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+    
+    def _cache_version(self):
+        """Version token for cached results: data_version plus file metadata"""
+        return self._pragma_data_version(), self.get_data_version()
+    
+    def fetch(self, query, params=None, max_rows=None):
+        """Execute SELECT query and return columnar results, reading at most max_rows rows"""
+        if self.result_cache is None:
+            return self._fetch(query, params, max_rows)
+        
+        key = self.result_cache.make_key(query, params) + (max_rows,)
+        version = self._cache_version()
         
+        cached = self.result_cache.get(key, version)
+        if cached is not None:
+            return {**cached, "rows": [list(row) for row in cached["rows"]]}
+        
+        result = self._fetch(query, params, max_rows)
+        
+        if "error" not in result:
+            self.result_cache.put(key, version, {**result, "rows": [list(row) for row in result["rows"]]})
+        
+        return result
+    
+    def execute_query(self, query, params=None):
+        """Execute SELECT query and return results"""
+        result = self.fetch(query, params)
+        
+        if "error" in result:
+            return result
+        
+        return [dict(zip(result["columns"], row)) for row in result["rows"]]
+    
+    def count_rows(self, query, params=None):
+        """Count the rows a SELECT query would return without materialising them"""
+        # The newline keeps a trailing -- comment from swallowing the closing parenthesis
+        result = self.fetch(f"SELECT COUNT(*) FROM ({query.strip().rstrip(';')}\n)", params)
+        
+        if "error" in result or not result["rows"]:
+            return None
+        return result["rows"][0][0]
+    
+    def get_cache_stats(self):
+        """Get query result cache statistics"""
+        if self.result_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.result_cache.get_stats()}
+    
+    @staticmethod
+    def has_top_level_limit(query):
+        """Check whether the outermost SELECT already has a LIMIT clause"""
+        stripped = QueryResultCache._STRING_LITERAL.sub("''", query.lower())
+        previous = None
+        while previous != stripped:
+            previous = stripped
+            stripped = re.sub(r"\([^()]*\)", "()", stripped)
+        return re.search(r"\blimit\b", stripped) is not None
+    
+    def apply_row_limit(self, query, limit=None):
+        """Wrap an unbounded SELECT so the engine stops after limit rows"""
+        limit = limit or Config.SQL_AUTO_LIMIT
+        query = query.strip().rstrip(';')
+        
+        if self.has_top_level_limit(query):
+            return query
+        return f"SELECT * FROM ({query}\n) LIMIT {int(limit)}"
+    
+    @contextmanager
+    def _query_budget(self, conn):
+        """Abort the running statement once it exceeds the time or VM-step budget"""
+        deadline = time.monotonic() + Config.SQL_QUERY_TIMEOUT
+        max_calls = max(1, Config.SQL_MAX_VM_STEPS // Config.SQL_PROGRESS_INTERVAL)
+        state = {"calls": 0, "reason": None}
+        
+        def progress():
+            state["calls"] += 1
+            if time.monotonic() > deadline:
+                state["reason"] = f"time limit of {Config.SQL_QUERY_TIMEOUT:g}s"
+                return 1
+            if state["calls"] > max_calls:
+                state["reason"] = f"step limit of {Config.SQL_MAX_VM_STEPS:,} VM steps"
+                return 1
+            return 0
+        
+        conn.set_progress_handler(progress, Config.SQL_PROGRESS_INTERVAL)
+        try:
+            yield
+        except sqlite3.OperationalError as e:
+            if state["reason"]:
+                raise QueryBudgetExceeded(state["reason"]) from e
+            raise
         finally:
-            conn.close()
+            conn.set_progress_handler(None, 0)
+    
+    def _fetch(self, query, params=None, max_rows=None):
+        """Execute SELECT query against the database, fetching rows in batches"""
+        try:
+            with self.pool.connection() as conn, self._query_budget(conn):
+                if self.plan_recorder is not None:
+                    self.plan_recorder.capture(conn, query, params)
+                
+                cursor = conn.cursor()
+                
+                try:
+                    if params:
+                        cursor.execute(query, params)
+                    else:
+                        cursor.execute(query)
+                    
+                    columns = [description[0] for description in cursor.description or []]
+                    rows = []
+                    
+                    while max_rows is None or len(rows) < max_rows:
+                        batch_size = Config.SQL_FETCH_BATCH_SIZE
+                        if max_rows is not None:
+                            batch_size = min(batch_size, max_rows - len(rows))
+                        
+                        batch = cursor.fetchmany(batch_size)
+                        if not batch:
+                            break
+                        rows.extend(list(row) for row in batch)
+                    
+                    truncated = max_rows is not None and cursor.fetchone() is not None
+                    
+                    return {"columns": columns, "rows": rows, "truncated": truncated}
+                finally:
+                    cursor.close()
+        
+        except QueryBudgetExceeded as e:
+            return {
+                "error": (
+                    f"Query stopped after exceeding the {e}. "
+                    "Add WHERE filters, avoid cross joins, or aggregate with GROUP BY and retry."
+                )
+            }
+        except sqlite3.DatabaseError as e:
+            if "not authorized" in str(e):
+                return {"error": "Only read-only SELECT statements are allowed"}
+            return {"error": f"SQL execution error: {str(e)}"}
+    
+    def get_table_names(self):
+        """Names of the tables and views present in the database"""
+        try:
+            with self.pool.connection() as conn:
+                rows = conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')").fetchall()
+                return {row[0] for row in rows}
+        except sqlite3.Error as e:
+            print(f"Error listing tables: {e}")
+            return set()
     
     def get_schema_info(self):
         """Get database schema for LLM context"""
@@ -81,6 +498,67 @@ class SQLDatabase:
                 "description": "Customer support tickets and their status"
             }
         }
+        
+        tables = self.get_table_names()
+        
+        if "support_tickets_fts" in tables:
+            schema["support_tickets_fts"] = {
+                "columns": [
+                    "rowid (INTEGER, equals support_tickets.ticket_id)",
+                    "subject (TEXT, full-text indexed)",
+                    "description (TEXT, full-text indexed)"
+                ],
+                "description": "FTS5 full-text index over support ticket subjects and descriptions",
+                "usage": (
+                    "Use this instead of LIKE '%...%' to search ticket text. "
+                    "Join on support_tickets.ticket_id = support_tickets_fts.rowid, filter with "
+                    "support_tickets_fts MATCH '\"double charge\"' (quote phrases; OR, AND, NOT and "
+                    "prefix* are supported; a column filter looks like 'subject: refund'), "
+                    "and ORDER BY bm25(support_tickets_fts) for best matches first."
+                )
+            }
+        
+        summary_usage = "Pre-aggregated and kept current by triggers; prefer it over GROUP BY on support_tickets."
+        
+        if "ticket_stats" in tables:
+            schema["ticket_stats"] = {
+                "columns": [
+                    "status (TEXT)",
+                    "priority (TEXT)",
+                    "category (TEXT, 'uncategorized' when missing)",
+                    "ticket_count (INTEGER)"
+                ],
+                "description": "Ticket counts per status, priority and category combination",
+                "usage": f"{summary_usage} SUM(ticket_count) with GROUP BY on any subset of the keys."
+            }
+        
+        if "customer_ticket_stats" in tables:
+            schema["customer_ticket_stats"] = {
+                "columns": [
+                    "customer_id (INTEGER PRIMARY KEY)",
+                    "open_tickets (INTEGER, status open or in_progress)",
+                    "total_tickets (INTEGER)"
+                ],
+                "description": "Open and total ticket counts per customer",
+                "usage": f"{summary_usage} Customers without tickets have no row."
+            }
+        
+        if "ticket_resolution_summary" in tables:
+            schema["ticket_resolution_summary"] = {
+                "columns": [
+                    "priority (TEXT)",
+                    "category (TEXT)",
+                    "resolved_tickets (INTEGER)",
+                    "total_resolution_hours (REAL, sum of resolved_at - created_at)",
+                    "avg_resolution_hours (REAL, resolved_at - created_at)"
+                ],
+                "description": "Average resolution time per priority and category",
+                "usage": (
+                    f"{summary_usage} For a combined average use "
+                    "SUM(total_resolution_hours) / SUM(resolved_tickets) FROM ticket_resolution_summary."
+                )
+            }
+        
         return schema
     
     def validate_query(self, query):
@@ -112,24 +590,21 @@ class SQLDatabase:
     
     def test_connection(self):
         """Test database connection and return basic stats"""
-        conn = self.get_connection()
-        if not conn:
-            return None
-        
         try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM customers")
-            customer_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM support_tickets")
-            ticket_count = cursor.fetchone()[0]
-            
-            return {
-                "status": "connected",
-                "customers": customer_count,
-                "tickets": ticket_count
-            }
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM customers")
+                customer_count = cursor.fetchone()[0]
+                
+                cursor.execute("SELECT COUNT(*) FROM support_tickets")
+                ticket_count = cursor.fetchone()[0]
+                
+                return {
+                    "status": "connected",
+                    "customers": customer_count,
+                    "tickets": ticket_count,
+                    "query_cache": self.get_cache_stats(),
+                    "memory_replica": self.replica.get_stats() if self.replica else {"enabled": False}
+                }
         except Exception as e:
             return {"error": str(e)}
-        finally:
-            conn.close()
@@ -0,0 +1,98 @@
+import numpy as np
+from src.config import Config
+
+class TempDocumentIndex:
+    """In-memory cosine similarity index over a session's temporary documents"""
+    
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or Config.TEMP_INDEX_MAX_MB * 1024 * 1024
+        self.chunks = []
+        self.embeddings = None
+    
+    def __len__(self):
+        return len(self.chunks)
+    
+    @property
+    def nbytes(self):
+        """Approximate memory held by embeddings and chunk text"""
+        matrix_bytes = self.embeddings.nbytes if self.embeddings is not None else 0
+        return matrix_bytes + sum(len(chunk['text']) for chunk in self.chunks)
+    
+    @staticmethod
+    def _normalize(matrix):
+        """Scale rows to unit length so dot products are cosine similarities"""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
+    def sources(self):
+        """Get source filenames in upload order"""
+        return list(dict.fromkeys(chunk['metadata']['source'] for chunk in self.chunks))
+    
+    def add(self, chunks, embeddings):
+        """Add chunks with their embeddings, evicting the oldest sources over the memory cap"""
+        if not chunks:
+            return []
+        
+        embeddings = self._normalize(embeddings)
+        incoming_bytes = embeddings.nbytes + sum(len(chunk['text']) for chunk in chunks)
+        if incoming_bytes > self.max_bytes:
+            raise ValueError(
+                f"Document needs {incoming_bytes / 1024 / 1024:.1f} MB, "
+                f"over the {self.max_bytes / 1024 / 1024:.0f} MB session limit"
+            )
+        
+        for source in {chunk['metadata']['source'] for chunk in chunks}:
+            self.remove_source(source)
+        
+        evicted = []
+        while self.chunks and self.nbytes + incoming_bytes > self.max_bytes:
+            oldest = self.chunks[0]['metadata']['source']
+            self.remove_source(oldest)
+            evicted.append(oldest)
+        
+        self.chunks.extend(chunks)
+        if self.embeddings is None:
+            self.embeddings = embeddings
+        else:
+            self.embeddings = np.vstack([self.embeddings, embeddings])
+        
+        return evicted
+    
+    def remove_source(self, source):
+        """Remove every chunk from a source and return how many were removed"""
+        keep = [i for i, chunk in enumerate(self.chunks) if chunk['metadata']['source'] != source]
+        removed = len(self.chunks) - len(keep)
+        
+        if removed:
+            self.chunks = [self.chunks[i] for i in keep]
+            self.embeddings = self.embeddings[keep] if keep else None
+        
+        return removed
+    
+    def clear(self):
+        """Remove all chunks"""
+        self.chunks = []
+        self.embeddings = None
+    
+    def search(self, query_embedding, k=4):
+        """Return the top-k chunks by cosine similarity"""
+        if not self.chunks:
+            return []
+        
+        query = self._normalize(query_embedding).reshape(-1)
+        similarities = self.embeddings @ query
+        
+        k = min(k, len(self.chunks))
+        top_k = np.argpartition(-similarities, k - 1)[:k]
+        top_k = top_k[np.argsort(-similarities[top_k])]
+        
+        return [
+            {
+                'document': self.chunks[idx]['text'],
+                'metadata': self.chunks[idx]['metadata'],
+                'distance': float(1 - similarities[idx])
+            }
+            for idx in top_k
+        ]
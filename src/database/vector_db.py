@@ -1,31 +1,39 @@
-from sentence_transformers import SentenceTransformer
 import lancedb
-import numpy as np
+import pyarrow as pa
 import os
+import threading
 from src.config import Config
+from src.utils.embeddings import encode_texts, get_embedding_model
+
+_STAGING_TABLE = "policy_documents_staging"
 
 class VectorStore:
     """Manages document embeddings and similarity search using LanceDB"""
     
     def __init__(self):
-        self.embedding_model = None
         self.db = None
         self.table = None
         self.dimension = 768
+        self.vector_index_ready = False
+        self.lock = threading.RLock()
         self._initialize()
     
+    @property
+    def embedding_model(self):
+        """Shared embedding model, loaded lazily on first use"""
+        return get_embedding_model(Config.EMBEDDING_MODEL)
+    
     def _initialize(self):
-        """Initialize embedding model and LanceDB"""
+        """Initialize LanceDB"""
         try:
-            print(f"Loading embedding model: {Config.EMBEDDING_MODEL}")
-            self.embedding_model = SentenceTransformer(Config.EMBEDDING_MODEL)
-            
             os.makedirs(Config.VECTOR_STORE_PATH, exist_ok=True)
             
             self.db = lancedb.connect(Config.VECTOR_STORE_PATH)
             
             if "policy_documents" in self.db.table_names():
                 self.table = self.db.open_table("policy_documents")
+                self._ensure_source_index()
+                self.vector_index_ready = self._vector_index_name() is not None
                 print(f"LanceDB initialized at {Config.VECTOR_STORE_PATH}")
                 print(f"Current collection size: {len(self.table)} documents")
             else:
@@ -36,6 +44,97 @@ class VectorStore:
             print(f"Error initializing vector store: {e}")
             raise
     
+    def _ensure_source_index(self):
+        """Create a scalar index on the source column if it is missing"""
+        if self.table is None:
+            return
+        
+        try:
+            for index in self.table.list_indices():
+                if "source" in index.columns:
+                    return
+            
+            self.table.create_scalar_index("source")
+        except Exception as e:
+            print(f"Error creating source index: {e}")
+    
+    def _refresh_source_index(self):
+        """Fold rows appended since the source index was built into it so filters stay index-only"""
+        try:
+            for index in self.table.list_indices():
+                if "source" in index.columns:
+                    stats = self.table.index_stats(index.name)
+                    if stats and stats.num_unindexed_rows:
+                        self.table.optimize()
+                    return
+        except Exception as e:
+            print(f"Error refreshing source index: {e}")
+    
+    def _vector_index_name(self):
+        """Return the name of the ANN index on the vector column, if any"""
+        if self.table is None:
+            return None
+        
+        try:
+            for index in self.table.list_indices():
+                if "vector" in index.columns:
+                    return index.name
+        except Exception as e:
+            print(f"Error listing indices: {e}")
+        return None
+    
+    def _unindexed_rows(self, index_name):
+        """Number of rows appended since the vector index was last built"""
+        try:
+            stats = self.table.index_stats(index_name)
+            return stats.num_unindexed_rows if stats else 0
+        except Exception:
+            return 0
+    
+    def ensure_vector_index(self, force=False):
+        """Refresh the source index, then build or rebuild the ANN index once the table is large enough"""
+        if self.table is None:
+            return False
+        
+        try:
+            with self.lock:
+                self._refresh_source_index()
+                
+                row_count = self.table.count_rows()
+                if row_count < Config.VECTOR_INDEX_MIN_ROWS and not force:
+                    return False
+                
+                index_name = self._vector_index_name()
+                if index_name and not force:
+                    if self._unindexed_rows(index_name) < Config.VECTOR_INDEX_REBUILD_ROWS:
+                        return False
+                
+                num_partitions = Config.VECTOR_INDEX_PARTITIONS or max(1, int(row_count ** 0.5))
+                num_sub_vectors = Config.VECTOR_INDEX_SUB_VECTORS or None
+                
+                print(f"Building {Config.VECTOR_INDEX_TYPE} index over {row_count} documents "
+                      f"({num_partitions} partitions)")
+                self.table.create_index(
+                    metric=Config.VECTOR_INDEX_METRIC,
+                    num_partitions=num_partitions,
+                    num_sub_vectors=num_sub_vectors,
+                    vector_column_name="vector",
+                    index_type=Config.VECTOR_INDEX_TYPE,
+                    replace=True
+                )
+                self.vector_index_ready = True
+                return True
+            
+        except Exception as e:
+            print(f"Error building vector index: {e}")
+            return False
+    
+    @staticmethod
+    def _source_predicate(source_filename):
+        """Build a SQL filter matching rows from one source file"""
+        escaped = str(source_filename).replace("'", "''")
+        return f"source = '{escaped}'"
+    
     def embed_text(self, text):
         """Generate embeddings for given text"""
         if not text or not text.strip():
@@ -48,61 +147,182 @@ class VectorStore:
             print(f"Error generating embedding: {e}")
             return None
     
-    def add_documents(self, documents, metadatas, ids):
+    def embed_texts(self, texts, batch_size=None):
+        """Generate embeddings for a list of texts as one float32 matrix, reusing cached ones"""
+        return encode_texts(texts, Config.EMBEDDING_MODEL, batch_size=batch_size)
+    
+    def _build_rows(self, documents, metadatas, ids, embeddings):
+        """Build an Arrow table of rows from a contiguous embedding matrix"""
+        dimension = embeddings.shape[1]
+        vectors = pa.FixedSizeListArray.from_arrays(
+            pa.array(embeddings.reshape(-1), type=pa.float32()),
+            dimension
+        )
+        
+        return pa.table({
+            "id": pa.array(ids, type=pa.string()),
+            "document": pa.array(documents, type=pa.string()),
+            "source": pa.array([m.get("source", "unknown") for m in metadatas], type=pa.string()),
+            "page": pa.array([m.get("page", 0) for m in metadatas], type=pa.int64()),
+            "chunk_index": pa.array([m.get("chunk_index", 0) for m in metadatas], type=pa.int64()),
+            "vector": vectors
+        })
+    
+    def add_documents(self, documents, metadatas, ids, batch_size=None, build_index=True):
         """Add documents to vector store with embeddings"""
         if not documents:
             print("No documents to add")
             return False
         
         try:
-            valid_data = []
-            
-            for doc, metadata, doc_id in zip(documents, metadatas, ids):
-                if doc and doc.strip():
-                    embedding = self.embed_text(doc)
-                    if embedding:
-                        valid_data.append({
-                            "id": doc_id,
-                            "document": doc,
-                            "source": metadata.get("source", "unknown"),
-                            "page": metadata.get("page", 0),
-                            "chunk_index": metadata.get("chunk_index", 0),
-                            "vector": embedding
-                        })
-            
-            if not valid_data:
+            valid = [
+                (doc, metadata, str(doc_id))
+                for doc, metadata, doc_id in zip(documents, metadatas, ids)
+                if doc and doc.strip()
+            ]
+            
+            if not valid:
                 print("No valid documents to add after filtering")
                 return False
             
-            if self.table is None:
-                self.table = self.db.create_table("policy_documents", data=valid_data)
-            else:
-                self.table.add(valid_data)
+            valid_docs, valid_metadatas, valid_ids = (list(column) for column in zip(*valid))
+            embeddings = self.embed_texts(valid_docs, batch_size=batch_size)
+            rows = self._build_rows(valid_docs, valid_metadatas, valid_ids, embeddings)
             
-            print(f"Added {len(valid_data)} documents to vector store")
+            with self.lock:
+                if self.table is None:
+                    self.table = self.db.create_table("policy_documents", data=rows)
+                    self._ensure_source_index()
+                else:
+                    self.table.add(rows)
+                
+                print(f"Added {rows.num_rows} documents to vector store")
+                
+                if build_index:
+                    self.ensure_vector_index()
             return True
             
         except Exception as e:
             print(f"Error adding documents: {e}")
             return False
     
-    def similarity_search(self, query, k=None):
-        """Search for similar documents using query text"""
+    def replace_source(self, source_filename, documents, metadatas, ids, embeddings=None):
+        """Atomically replace every row from one source file with a new set of chunks"""
+        try:
+            if not documents:
+                if self.table is not None:
+                    with self.lock:
+                        self.table.delete(self._source_predicate(source_filename))
+                return True
+            
+            if embeddings is None:
+                embeddings = self.embed_texts(documents)
+            rows = self._build_rows(documents, metadatas, [str(doc_id) for doc_id in ids], embeddings)
+            
+            with self.lock:
+                if self.table is None:
+                    self.table = self.db.create_table("policy_documents", data=rows)
+                    self._ensure_source_index()
+                else:
+                    (
+                        self.table.merge_insert("id")
+                        .when_matched_update_all()
+                        .when_not_matched_insert_all()
+                        .when_not_matched_by_source_delete(self._source_predicate(source_filename))
+                        .execute(rows)
+                    )
+            
+            print(f"Replaced {source_filename} with {rows.num_rows} chunks")
+            return True
+            
+        except Exception as e:
+            print(f"Error replacing {source_filename}: {e}")
+            return False
+    
+    def stage_documents(self, documents, metadatas, ids, embeddings):
+        """Append embedded chunks to the staging table a source is later swapped in from"""
+        try:
+            rows = self._build_rows(documents, metadatas, [str(doc_id) for doc_id in ids], embeddings)
+            
+            with self.lock:
+                if _STAGING_TABLE in self.db.table_names():
+                    self.db.open_table(_STAGING_TABLE).add(rows)
+                else:
+                    self.db.create_table(_STAGING_TABLE, data=rows)
+            return True
+            
+        except Exception as e:
+            print(f"Error staging chunks: {e}")
+            return False
+    
+    def commit_staged_source(self, source_filename):
+        """Atomically replace every row from one source file with the staged chunks, then clear the staging table"""
+        try:
+            with self.lock:
+                if _STAGING_TABLE not in self.db.table_names():
+                    return self.replace_source(source_filename, [], [], [])
+                
+                staging = self.db.open_table(_STAGING_TABLE)
+                staged = staging.count_rows()
+                # Streamed in batches so a large file is never materialized in memory
+                rows = staging.search().limit(None).to_batches(Config.INGEST_BATCH_SIZE)
+                
+                if self.table is None:
+                    self.table = self.db.create_table("policy_documents", data=rows)
+                    self._ensure_source_index()
+                else:
+                    (
+                        self.table.merge_insert("id")
+                        .when_matched_update_all()
+                        .when_not_matched_insert_all()
+                        .when_not_matched_by_source_delete(self._source_predicate(source_filename))
+                        .execute(rows)
+                    )
+                
+                self.db.drop_table(_STAGING_TABLE)
+            
+            print(f"Replaced {source_filename} with {staged} chunks")
+            return True
+            
+        except Exception as e:
+            print(f"Error replacing {source_filename}: {e}")
+            return False
+    
+    def drop_staging(self):
+        """Discard any chunks staged by an unfinished or failed ingestion"""
+        try:
+            with self.lock:
+                if _STAGING_TABLE in self.db.table_names():
+                    self.db.drop_table(_STAGING_TABLE)
+        except Exception as e:
+            print(f"Error dropping staging table: {e}")
+    
+    def similarity_search(self, query, k=None, query_embedding=None):
+        """Search for similar documents using query text or a precomputed query embedding"""
         if not query or not query.strip():
             return None
         
-        if self.table is None:
+        table = self.table
+        if table is None:
             print("No documents in vector store")
             return None
         
         k = k or Config.TOP_K_RETRIEVAL
         
         try:
-            query_embedding = self.embed_text(query)
-            if not query_embedding:
-                return None
+            if query_embedding is None:
+                query_embedding = self.embed_text(query)
+                if not query_embedding:
+                    return None
+            
+            search = table.search(query_embedding).limit(k)
             
-            results = self.table.search(query_embedding).limit(k).to_list()
+            if self.vector_index_ready:
+                search = search.distance_type(Config.VECTOR_INDEX_METRIC).nprobes(Config.VECTOR_SEARCH_NPROBES)
+                if Config.VECTOR_SEARCH_REFINE_FACTOR > 0:
+                    search = search.refine_factor(Config.VECTOR_SEARCH_REFINE_FACTOR)
+            
+            results = search.to_list()
             
             if not results:
                 return None
@@ -126,6 +346,18 @@ class VectorStore:
             print(f"Error during similarity search: {e}")
             return None
     
+    def get_table_version(self):
+        """Get the current version of the policy_documents table"""
+        table = self.table
+        if table is None:
+            return 0
+        
+        try:
+            return table.version
+        except Exception as e:
+            print(f"Error getting table version: {e}")
+            return None
+    
     def get_collection_stats(self):
         """Get statistics about the current collection"""
         try:
@@ -144,9 +376,11 @@ class VectorStore:
     def clear_collection(self):
         """Clear all documents from collection"""
         try:
-            if self.table is not None:
-                self.db.drop_table("policy_documents")
-                self.table = None
+            with self.lock:
+                if self.table is not None:
+                    self.db.drop_table("policy_documents")
+                    self.table = None
+                    self.vector_index_ready = False
             print("Collection cleared successfully")
             return True
         except Exception as e:
@@ -159,22 +393,15 @@ class VectorStore:
             if self.table is None:
                 return False
             
-            all_data = self.table.to_pandas()
-            
-            filtered_data = all_data[all_data['source'] != source_filename]
+            predicate = self._source_predicate(source_filename)
             
-            deleted_count = len(all_data) - len(filtered_data)
-            
-            if deleted_count == 0:
-                return False
-            
-            self.db.drop_table("policy_documents")
-            
-            if len(filtered_data) > 0:
-                data_list = filtered_data.to_dict('records')
-                self.table = self.db.create_table("policy_documents", data=data_list)
-            else:
-                self.table = None
+            with self.lock:
+                deleted_count = self.table.count_rows(predicate)
+                
+                if deleted_count == 0:
+                    return False
+                
+                self.table.delete(predicate)
             
             print(f"Deleted {deleted_count} chunks from {source_filename}")
             return True
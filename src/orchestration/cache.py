@@ -0,0 +1,93 @@
+from collections import OrderedDict
+import re
+import threading
+import time
+import numpy as np
+
+_LITERALS = re.compile(r"\d+(?:\.\d+)?|'[^']*'|\"[^\"]*\"")
+
+def query_literals(query):
+    """Numbers and quoted strings in a query; cached answers are only reused when these match"""
+    return tuple(sorted(_LITERALS.findall(query.lower())))
+
+class SemanticCache:
+    """LRU answer cache keyed by query embedding similarity"""
+    
+    def __init__(self, threshold, max_entries, ttl_seconds):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self._next_key = 0
+        self._lock = threading.Lock()
+    
+    def _purge(self, version):
+        """Drop entries that are expired or were built against older data"""
+        now = time.monotonic()
+        for key in list(self.entries):
+            entry = self.entries[key]
+            if entry["version"] != version:
+                del self.entries[key]
+                self.stats["invalidations"] += 1
+            elif now - entry["created_at"] > self.ttl_seconds:
+                del self.entries[key]
+                self.stats["expirations"] += 1
+    
+    def lookup(self, embedding, version, query=None):
+        """Return the cached response for the most similar query with the same literals, or None"""
+        with self._lock:
+            self._purge(version)
+            
+            literals = query_literals(query) if query is not None else None
+            keys = [
+                key for key in self.entries
+                if literals is None or self.entries[key]["literals"] == literals
+            ]
+            
+            if not keys:
+                self.stats["misses"] += 1
+                return None
+            
+            matrix = np.vstack([self.entries[key]["embedding"] for key in keys])
+            similarities = matrix @ embedding
+            best = int(np.argmax(similarities))
+            
+            if similarities[best] < self.threshold:
+                self.stats["misses"] += 1
+                return None
+            
+            self.entries.move_to_end(keys[best])
+            self.stats["hits"] += 1
+            return self.entries[keys[best]]["response"]
+    
+    def store(self, query, embedding, response, version):
+        """Cache a response, evicting the least recently used entries over capacity"""
+        with self._lock:
+            self.entries[self._next_key] = {
+                "query": query,
+                "literals": query_literals(query),
+                "embedding": np.asarray(embedding, dtype=np.float32),
+                "response": response,
+                "version": version,
+                "created_at": time.monotonic()
+            }
+            self._next_key += 1
+            
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+    
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self.entries.clear()
+    
+    def get_stats(self):
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self.entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -1,12 +1,19 @@
 from langgraph.graph import StateGraph, END
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import logging
 import time
 from src.orchestration.state import AgentState
+from src.orchestration.cache import SemanticCache
 from src.agents.router import RouterAgent
 from src.agents.sql_agent import SQLAgent
 from src.agents.rag_agent import RAGAgent
 from openai import OpenAI
 from src.config import Config
+from src.utils.embeddings import encode_query
+
+_ERROR_PREFIXES = ("Error", "Orchestration error", "SQL agent error", "RAG agent error")
+_PLACEHOLDER_RESPONSES = ("Working on it...",)
 
 class MultiAgentOrchestrator:
     """LangGraph-based multi-agent orchestration"""
@@ -17,15 +24,91 @@ class MultiAgentOrchestrator:
         self.sql_agent = SQLAgent()
         self.rag_agent = RAGAgent()
         self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.AGENT_MAX_WORKERS,
+            thread_name_prefix="agent"
+        )
+        self.answer_cache = SemanticCache(
+            threshold=Config.ANSWER_CACHE_THRESHOLD,
+            max_entries=Config.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.ANSWER_CACHE_TTL_SECONDS
+        ) if Config.ANSWER_CACHE_ENABLED else None
         
         self.graph = self._build_graph()
     
+    def _embed_query(self, user_query):
+        """Embed the query once per request for the answer cache, local router and retrieval"""
+        try:
+            return encode_query(user_query, Config.EMBEDDING_MODEL)
+        except Exception:
+            self.logger.exception("Query embedding error")
+            return None
+    
+    def _cache_key(self, user_query, conversation_history, embedding):
+        """Return (embedding, data version) for the answer cache, or None when it does not apply"""
+        if self.answer_cache is None or conversation_history or embedding is None:
+            return None
+        
+        try:
+            version = (
+                self.rag_agent.vector_store.get_table_version(),
+                self.sql_agent.db.get_data_version()
+            )
+            return embedding, version
+        except Exception:
+            self.logger.exception("Answer cache key error")
+            return None
+    
+    def _cache_response(self, user_query, cache_key, response, agent):
+        """Store a successful policy answer in the answer cache"""
+        # Customer data answers depend on ids and names that embeddings barely separate,
+        # so only RAG answers are reused
+        if cache_key is None or agent != 'RAG_AGENT':
+            return
+        if not response or response.startswith(_ERROR_PREFIXES) or response in _PLACEHOLDER_RESPONSES:
+            return
+        
+        embedding, version = cache_key
+        self.answer_cache.store(user_query, embedding, response, version)
+    
+    def get_cache_stats(self):
+        """Get answer cache hit/miss statistics"""
+        if self.answer_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.answer_cache.get_stats()}
+    
+    def _route_with_speculation(self, user_query, query_embedding=None):
+        """Route the query while policy retrieval runs speculatively in the background"""
+        retrieve = partial(self.rag_agent.retrieve_documents, user_query, query_embedding=query_embedding)
+        retrieval_future = None
+        if Config.SPECULATIVE_RETRIEVAL:
+            retrieval_future = self.executor.submit(retrieve)
+        
+        route_decision = self.router.route(user_query, query_embedding)
+        
+        retrieved_docs = None
+        if route_decision.get('agent') == 'SQL_AGENT':
+            if retrieval_future is not None:
+                retrieval_future.cancel()
+                self.logger.info("Speculative retrieval discarded")
+        elif retrieval_future is not None:
+            retrieved_docs = retrieval_future.result()
+            self.logger.info("Speculative retrieval reused")
+        else:
+            retrieved_docs = retrieve()
+        
+        return route_decision, retrieved_docs
+    
     def _route_query(self, state: AgentState) -> AgentState:
         """Route the query to appropriate agent"""
         start_time = time.perf_counter()
         try:
-            route_decision = self.router.route(state['user_query'])
+            route_decision, retrieved_docs = self._route_with_speculation(
+                state['user_query'],
+                state.get('query_embedding')
+            )
             state['route_decision'] = route_decision
+            state['retrieved_docs'] = retrieved_docs
             self.logger.info(
                 "Routing decision: %s (confidence: %s) in %.2fs",
                 route_decision.get('agent'),
@@ -63,7 +146,8 @@ class MultiAgentOrchestrator:
             self.logger.info("RAG agent start")
             result = self.rag_agent.query(
                 state['user_query'],
-                state.get('conversation_history')
+                state.get('conversation_history'),
+                retrieved_docs=state.get('retrieved_docs')
             )
             state['rag_result'] = result
             self.logger.info("RAG agent done in %.2fs", time.perf_counter() - start_time)
@@ -73,21 +157,40 @@ class MultiAgentOrchestrator:
         
         return state
     
+    def _run_branch(self, name, agent_query, user_query, conversation_history):
+        """Run one agent branch, logging its duration and capturing errors"""
+        start_time = time.perf_counter()
+        try:
+            result = agent_query(user_query, conversation_history)
+            self.logger.info("%s branch done in %.2fs", name, time.perf_counter() - start_time)
+            return result
+        except Exception as e:
+            self.logger.exception("%s branch error after %.2fs", name, time.perf_counter() - start_time)
+            return f"{name} agent error: {str(e)}"
+    
+    def _run_both_agents(self, user_query, conversation_history=None, retrieved_docs=None):
+        """Run the SQL and RAG agents in parallel and return both results"""
+        rag_query = partial(self.rag_agent.query, retrieved_docs=retrieved_docs)
+        
+        sql_future = self.executor.submit(
+            self._run_branch, "SQL", self.sql_agent.query, user_query, conversation_history
+        )
+        rag_future = self.executor.submit(
+            self._run_branch, "RAG", rag_query, user_query, conversation_history
+        )
+        return sql_future.result(), rag_future.result()
+    
     def _call_both_agents(self, state: AgentState) -> AgentState:
         """Execute both SQL and RAG agents"""
         start_time = time.perf_counter()
         try:
             self.logger.info("Both agents start")
-            sql_result = self.sql_agent.query(
+            sql_result, rag_result = self._run_both_agents(
                 state['user_query'],
-                state.get('conversation_history')
+                state.get('conversation_history'),
+                state.get('retrieved_docs')
             )
             state['sql_result'] = sql_result
-            
-            rag_result = self.rag_agent.query(
-                state['user_query'],
-                state.get('conversation_history')
-            )
             state['rag_result'] = rag_result
             self.logger.info("Both agents done in %.2fs", time.perf_counter() - start_time)
             
@@ -194,10 +297,20 @@ Provide a unified response that addresses the user's question completely."""
         """Execute the multi-agent workflow"""
         self.logger.info("User query received")
         
+        query_embedding = self._embed_query(user_query)
+        cache_key = self._cache_key(user_query, conversation_history, query_embedding)
+        if cache_key is not None:
+            cached = self.answer_cache.lookup(*cache_key, query=user_query)
+            if cached is not None:
+                self.logger.info("Answer cache hit")
+                return cached
+        
         initial_state = AgentState(
             user_query=user_query,
             conversation_history=conversation_history,
+            query_embedding=query_embedding,
             route_decision=None,
+            retrieved_docs=None,
             sql_result=None,
             rag_result=None,
             final_response=None,
@@ -207,7 +320,11 @@ Provide a unified response that addresses the user's question completely."""
         try:
             result = self.graph.invoke(initial_state)
             self.logger.info("Workflow completed")
-            return result.get('final_response', 'No response generated')
+            response = result.get('final_response', 'No response generated')
+            if not result.get('error'):
+                agent = (result.get('route_decision') or {}).get('agent')
+                self._cache_response(user_query, cache_key, response, agent)
+            return response
         except Exception as e:
             self.logger.exception("Workflow error")
             return f"Orchestration error: {str(e)}"
@@ -215,8 +332,29 @@ Provide a unified response that addresses the user's question completely."""
     def stream_query(self, user_query: str, conversation_history=None):
         """Stream response from the routed agent without full graph execution."""
         self.logger.info("Streaming query received")
-        route_decision = self.router.route(user_query)
+        
+        query_embedding = self._embed_query(user_query)
+        cache_key = self._cache_key(user_query, conversation_history, query_embedding)
+        if cache_key is not None:
+            cached = self.answer_cache.lookup(*cache_key, query=user_query)
+            if cached is not None:
+                self.logger.info("Streaming answer cache hit")
+                yield cached
+                return
+        
+        route = {}
+        response = None
+        for response in self._stream_routed(user_query, conversation_history, route, query_embedding):
+            yield response
+        
+        self._cache_response(user_query, cache_key, response, route.get('agent'))
+    
+    def _stream_routed(self, user_query: str, conversation_history=None, route=None, query_embedding=None):
+        """Route the query and stream the selected agent's response."""
+        route_decision, retrieved_docs = self._route_with_speculation(user_query, query_embedding)
         agent_type = route_decision.get('agent', 'RAG_AGENT')
+        if route is not None:
+            route['agent'] = agent_type
         self.logger.info("Streaming route: %s", agent_type)
 
         if agent_type == 'SQL_AGENT':
@@ -225,14 +363,19 @@ Provide a unified response that addresses the user's question completely."""
             return
 
         if agent_type == 'RAG_AGENT':
-            yield from self.rag_agent.stream_query(user_query, conversation_history)
+            yield from self.rag_agent.stream_query(
+                user_query,
+                conversation_history,
+                retrieved_docs=retrieved_docs
+            )
             self.logger.info("Streaming RAG agent complete")
             return
 
         yield "Working on it..."
         self.logger.info("Streaming BOTH path start")
-        sql_result = self.sql_agent.query(user_query, conversation_history)
-        rag_result = self.rag_agent.query(user_query, conversation_history)
+        start_time = time.perf_counter()
+        sql_result, rag_result = self._run_both_agents(user_query, conversation_history, retrieved_docs)
+        self.logger.info("Streaming BOTH agents done in %.2fs", time.perf_counter() - start_time)
 
         synthesis_prompt = f"""Combine these two responses into a single, coherent answer:
 
@@ -5,8 +5,10 @@ class AgentState(TypedDict):
     
     user_query: str
     conversation_history: Optional[List[Dict[str, str]]]
+    query_embedding: Optional[Any]
     
     route_decision: Optional[Dict[str, Any]]
+    retrieved_docs: Optional[List[Dict[str, Any]]]
     
     sql_result: Optional[str]
     rag_result: Optional[str]
@@ -1,23 +1,92 @@
 from pypdf import PdfReader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from src.config import Config
+from src.utils.tokens import token_length_function
+import hashlib
+import itertools
+import multiprocessing
 import os
+import signal
+import threading
+
+class PageTimeoutError(Exception):
+    """Raised when extracting a single PDF page takes longer than PDF_PAGE_TIMEOUT"""
+
+class PdfExtractionError(Exception):
+    """Raised by strict extraction when a PDF or one of its pages cannot be read"""
+
+_timeout_warned = False
+
+@contextmanager
+def _page_timeout(seconds):
+    """Interrupt the calling code after a number of seconds; needs SIGALRM and the main thread"""
+    global _timeout_warned
+    if not seconds:
+        yield
+        return
+    
+    if not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        if not _timeout_warned:
+            _timeout_warned = True
+            print(f"Warning: PDF_PAGE_TIMEOUT={seconds:g}s is not enforced here; it needs SIGALRM and "
+                  f"the main thread, so use PDF_PROCESS_WORKERS > 1 to extract in worker processes")
+        yield
+        return
+    
+    def _raise_timeout(signum, frame):
+        raise PageTimeoutError(f"page extraction exceeded {seconds}s")
+    
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+_worker_processor = None
+
+def _process_pdf_task(pdf_path, page_range):
+    """Process-pool worker: extract and chunk one page range of a PDF"""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor()
+    
+    return _worker_processor.page_chunks(pdf_path, page_range)
 
 class DocumentProcessor:
     """Handles PDF loading, text extraction, and chunking"""
     
     def __init__(self):
+        if Config.CHUNK_UNIT == "tokens":
+            self.chunk_settings = {
+                "unit": "tokens",
+                "size": Config.CHUNK_SIZE_TOKENS,
+                "overlap": Config.CHUNK_OVERLAP_TOKENS,
+                "model": Config.OPENAI_MODEL
+            }
+            length_function = token_length_function(Config.OPENAI_MODEL)
+        else:
+            self.chunk_settings = {"unit": "chars", "size": Config.CHUNK_SIZE, "overlap": Config.CHUNK_OVERLAP}
+            length_function = len
+        
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP,
-            length_function=len,
+            chunk_size=self.chunk_settings["size"],
+            chunk_overlap=self.chunk_settings["overlap"],
+            length_function=length_function,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
     
-    def load_pdf(self, pdf_path):
-        """Extract text from PDF file page by page"""
+    def load_pdf(self, pdf_path, page_range=None, page_timeout=None, strict=False):
+        """Extract text from PDF file page by page; strict raises PdfExtractionError instead of skipping failures"""
         if not os.path.exists(pdf_path):
             print(f"PDF file not found: {pdf_path}")
+            if strict:
+                raise PdfExtractionError(f"PDF file not found: {pdf_path}")
             return None
         
         try:
@@ -29,9 +98,17 @@ class DocumentProcessor:
             
             text_by_page = []
             filename = os.path.basename(pdf_path)
+            start, end = page_range or (0, len(reader.pages))
             
-            for page_num, page in enumerate(reader.pages, start=1):
-                text = page.extract_text()
+            for page_num in range(start + 1, min(end, len(reader.pages)) + 1):
+                try:
+                    with _page_timeout(page_timeout):
+                        text = reader.pages[page_num - 1].extract_text()
+                except PageTimeoutError as e:
+                    if strict:
+                        raise PdfExtractionError(f"page {page_num} of {filename}: {e}") from e
+                    print(f"Skipping page {page_num} of {filename}: {e}")
+                    continue
                 
                 if text and text.strip():
                     text_by_page.append({
@@ -40,11 +117,18 @@ class DocumentProcessor:
                         'source': filename
                     })
             
-            print(f"Extracted text from {len(text_by_page)} pages in {filename}")
+            if page_range:
+                print(f"Extracted text from {len(text_by_page)} pages in {filename} (pages {start + 1}-{min(end, len(reader.pages))})")
+            else:
+                print(f"Extracted text from {len(text_by_page)} pages in {filename}")
             return text_by_page
             
+        except PdfExtractionError:
+            raise
         except Exception as e:
             print(f"Error loading PDF {pdf_path}: {e}")
+            if strict:
+                raise PdfExtractionError(f"{pdf_path}: {e}") from e
             return None
     
     def chunk_document(self, pages_data):
@@ -75,6 +159,13 @@ class DocumentProcessor:
         
         return chunks
     
+    @staticmethod
+    def chunk_id(chunk):
+        """Stable id derived from a chunk's source, position and text"""
+        metadata = chunk['metadata']
+        key = f"{metadata['source']}\0{metadata['page']}\0{metadata['chunk_index']}\0{chunk['text']}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    
     def process_pdf(self, pdf_path):
         """Complete pipeline: load PDF and chunk into searchable segments"""
         pages = self.load_pdf(pdf_path)
@@ -91,14 +182,13 @@ class DocumentProcessor:
         print(f"Generated {len(chunks)} chunks from {pdf_path}")
         return chunks
     
-    def process_directory(self, directory_path):
-        """Process all PDF files in a directory"""
+    def process_directory(self, directory_path, workers=None):
+        """Process all PDF files in a directory, in parallel when more than one worker is configured"""
         if not os.path.isdir(directory_path):
             print(f"Directory not found: {directory_path}")
             return []
         
-        all_chunks = []
-        pdf_files = [f for f in os.listdir(directory_path) if f.lower().endswith('.pdf')]
+        pdf_files = sorted(f for f in os.listdir(directory_path) if f.lower().endswith('.pdf'))
         
         if not pdf_files:
             print(f"No PDF files found in {directory_path}")
@@ -106,15 +196,101 @@ class DocumentProcessor:
         
         print(f"Found {len(pdf_files)} PDF files to process")
         
-        for pdf_file in pdf_files:
-            pdf_path = os.path.join(directory_path, pdf_file)
-            chunks = self.process_pdf(pdf_path)
+        pdf_paths = [os.path.join(directory_path, pdf_file) for pdf_file in pdf_files]
+        all_chunks = []
+        file_chunks = 0
+        
+        for pdf_path, chunks, last in self.iter_page_chunks(pdf_paths, workers):
+            all_chunks.extend(chunks or [])
+            file_chunks += len(chunks or [])
             
-            if chunks:
-                all_chunks.extend(chunks)
+            if last:
+                if file_chunks:
+                    print(f"Generated {file_chunks} chunks from {pdf_path}")
+                else:
+                    print(f"No chunks generated from {pdf_path}")
+                file_chunks = 0
         
         return all_chunks
     
+    def page_ranges(self, pdf_path):
+        """Split a PDF into (start, end) page ranges of at most PDF_PAGES_PER_TASK pages"""
+        try:
+            page_count = len(PdfReader(pdf_path).pages)
+        except Exception as e:
+            print(f"Error reading {pdf_path}: {e}")
+            return []
+        
+        step = max(1, Config.PDF_PAGES_PER_TASK)
+        return [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    
+    def iter_page_chunks(self, pdf_paths, workers=None):
+        """Yield (pdf_path, chunks, last) per page range in order; chunks is None where extraction failed"""
+        workers = workers or Config.PDF_PROCESS_WORKERS or os.cpu_count() or 1
+        tasks = self._page_tasks(pdf_paths)
+        
+        if workers > 1:
+            yield from self._iter_parallel(tasks, workers)
+            return
+        
+        for pdf_path, page_range, last in tasks:
+            yield pdf_path, self.page_chunks(pdf_path, page_range), last
+    
+    def page_chunks(self, pdf_path, page_range=None):
+        """Extract and chunk one page range of a PDF, or return None if any of its text could not be extracted"""
+        try:
+            pages = self.load_pdf(pdf_path, page_range=page_range, page_timeout=Config.PDF_PAGE_TIMEOUT, strict=True)
+        except PdfExtractionError as e:
+            print(f"Extraction failed for {os.path.basename(pdf_path)}: {e}")
+            return None
+        return self.chunk_document(pages)
+    
+    def _page_tasks(self, pdf_paths):
+        """(pdf_path, page_range, last) tasks; a file without page ranges still gets one task so it is reported"""
+        for pdf_path in pdf_paths:
+            ranges = self.page_ranges(pdf_path) or [None]
+            for index, page_range in enumerate(ranges):
+                yield pdf_path, page_range, index == len(ranges) - 1
+    
+    def _iter_parallel(self, tasks, workers):
+        """Run page-range tasks on a process pool with at most 2 * workers in flight, yielding in submission order"""
+        pending = deque()
+        executor = None
+        
+        try:
+            # Spawned rather than forked: the caller may already hold LanceDB's runtime threads
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            print(f"Processing page ranges with {workers} worker processes")
+            
+            for task in tasks:
+                pending.append([task, None])
+                pending[-1][1] = executor.submit(_process_pdf_task, task[0], task[1])
+                
+                # Only a bounded window is submitted, so a slow consumer holds back extraction
+                if len(pending) > 2 * workers:
+                    yield self._next_result(pending)
+            
+            while pending:
+                yield self._next_result(pending)
+            return
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Parallel processing failed ({e}), falling back to serial processing")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        
+        # Tasks still pending when the pool broke are redone serially, followed by the rest
+        for pdf_path, page_range, last in itertools.chain([task for task, _ in pending], tasks):
+            yield pdf_path, self.page_chunks(pdf_path, page_range), last
+    
+    @staticmethod
+    def _next_result(pending):
+        """Wait for the oldest pending task; it stays queued if the pool breaks so it can be retried"""
+        (pdf_path, _, last), future = pending[0]
+        chunks = future.result()
+        pending.popleft()
+        return pdf_path, chunks, last
+    
     def get_chunk_preview(self, chunk, max_length=100):
         """Get a preview of chunk text for debugging"""
         text = chunk.get('text', '')
@@ -0,0 +1,167 @@
+import os
+import queue
+import threading
+import time
+from src.config import Config
+from src.processing.document_processor import DocumentProcessor
+from src.processing.manifest import IngestionManifest
+
+_DONE = object()
+
+class IngestionPipeline:
+    """Streams new or changed PDFs through extraction, chunking, embedding and LanceDB upserts"""
+    
+    def __init__(self, processor, vector_store, batch_size=None, queue_batches=None, manifest_path=None, workers=None):
+        self.processor = processor
+        self.vector_store = vector_store
+        self.workers = workers
+        self.batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        self.queue_batches = queue_batches or Config.INGEST_QUEUE_BATCHES
+        self.manifest = IngestionManifest(manifest_path)
+    
+    def iter_batches(self, pdf_paths):
+        """Yield (pdf_path, chunks, last, failed) batches; failed is set on the last batch of a file that did not extract"""
+        batch = []
+        failed = False
+        
+        for pdf_path, chunks, last in self.processor.iter_page_chunks(pdf_paths, self.workers):
+            if chunks is None:
+                failed = True
+            elif not failed:
+                for chunk in chunks:
+                    batch.append(chunk)
+                    if len(batch) >= self.batch_size:
+                        yield pdf_path, batch, False, False
+                        batch = []
+            
+            if last:
+                yield pdf_path, [] if failed else batch, True, failed
+                batch = []
+                failed = False
+    
+    @staticmethod
+    def _put(out, item, stop):
+        """Put an item on the bounded queue, giving up once the consumer has stopped"""
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _produce(self, batches, out, stop):
+        """Producer thread: push batches into a bounded queue so extraction never runs far ahead"""
+        try:
+            for item in batches:
+                if not self._put(out, item, stop):
+                    return
+            self._put(out, _DONE, stop)
+        except Exception as e:
+            self._put(out, e, stop)
+        finally:
+            # Shuts down the extraction pool when the consumer stopped early
+            batches.close()
+    
+    def _stage_batch(self, chunks):
+        """Embed a batch and append it to the vector store's staging table"""
+        documents = [chunk['text'] for chunk in chunks]
+        metadatas = [chunk['metadata'] for chunk in chunks]
+        ids = [DocumentProcessor.chunk_id(chunk) for chunk in chunks]
+        embeddings = self.vector_store.embed_texts(documents)
+        
+        if not self.vector_store.stage_documents(documents, metadatas, ids, embeddings):
+            raise RuntimeError(f"Failed to stage chunks for {metadatas[0]['source']}")
+    
+    def run(self, directory_path, force=False):
+        """Ingest new and changed PDFs in a directory and drop chunks of deleted ones"""
+        if not os.path.isdir(directory_path):
+            print(f"Directory not found: {directory_path}")
+            return None
+        
+        pdf_paths = sorted(
+            os.path.join(directory_path, f) for f in os.listdir(directory_path) if f.lower().endswith('.pdf')
+        )
+        
+        changed, unchanged, removed = self.manifest.diff(pdf_paths, self.processor.chunk_settings)
+        if force:
+            changed, unchanged = pdf_paths, []
+        print(f"{len(changed)} new or changed, {len(unchanged)} unchanged, {len(removed)} removed PDF files")
+        
+        for source in removed:
+            self.vector_store.delete_by_source(source)
+            self.manifest.forget(source)
+        
+        result = {"files": len(pdf_paths), "changed": len(changed), "removed": len(removed), "chunks": 0, "failed": []}
+        
+        if not changed:
+            if self.manifest.dirty:
+                self.manifest.save()
+            return result
+        
+        # Snapshots are taken before extraction starts, so a file edited mid-run is picked up next time
+        snapshots = {pdf_path: self.manifest.snapshot(pdf_path) for pdf_path in changed}
+        
+        batches = queue.Queue(maxsize=self.queue_batches)
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._produce,
+            args=(self.iter_batches(changed), batches, stop),
+            name="ingest-producer",
+            daemon=True
+        )
+        # Chunks of the file in progress live in the staging table, so memory stays bounded by the queue
+        self.vector_store.drop_staging()
+        producer.start()
+        
+        start_time = time.perf_counter()
+        staged = 0
+        files_done = 0
+        
+        try:
+            while True:
+                item = batches.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                
+                pdf_path, chunks, last, failed = item
+                source = os.path.basename(pdf_path)
+                
+                if chunks:
+                    self._stage_batch(chunks)
+                    staged += len(chunks)
+                
+                if not last:
+                    continue
+                
+                if failed:
+                    # Existing rows and the manifest entry are kept, so the file is retried next run
+                    self.vector_store.drop_staging()
+                    result["failed"].append(source)
+                    print(f"Skipped {source}: text extraction failed, previous chunks kept")
+                else:
+                    # The manifest is only updated once the file's rows have been swapped in
+                    if not self.vector_store.commit_staged_source(source):
+                        raise RuntimeError(f"Failed to replace chunks for {source}")
+                    self.manifest.record(pdf_path, staged, snapshots[pdf_path], self.processor.chunk_settings)
+                    self.manifest.save()
+                    
+                    result["chunks"] += staged
+                    files_done += 1
+                    
+                    elapsed = time.perf_counter() - start_time
+                    print(f"Ingested {source}: {files_done}/{len(changed)} files, "
+                          f"{result['chunks']} chunks ({result['chunks'] / elapsed if elapsed else 0:.1f} chunks/s)")
+                
+                staged = 0
+        finally:
+            stop.set()
+            producer.join()
+            self.vector_store.drop_staging()
+            if self.manifest.dirty:
+                self.manifest.save()
+        
+        self.vector_store.ensure_vector_index()
+        return result
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+from src.config import Config
+
+class IngestionManifest:
+    """Tracks the size, mtime and content hash of every ingested file"""
+    
+    def __init__(self, path=None):
+        self.path = path or Config.INGEST_MANIFEST_PATH
+        self.files = {}
+        self.dirty = False
+        self.load()
+    
+    def load(self):
+        """Read the manifest from disk, starting empty if it is missing or unreadable"""
+        if not os.path.exists(self.path):
+            return
+        
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable manifest {self.path}: {e}")
+            self.files = {}
+    
+    def save(self):
+        """Atomically write the manifest to disk"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+    
+    @staticmethod
+    def file_hash(path):
+        """SHA-256 of a file's contents"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def diff(self, paths, chunking=None):
+        """Split paths into (changed, unchanged, removed sources) against the manifest"""
+        changed, unchanged = [], []
+        
+        for path in paths:
+            source = os.path.basename(path)
+            entry = self.files.get(source)
+            stat = os.stat(path)
+            
+            # Files chunked with different settings must be re-chunked even if unchanged
+            if entry and entry.get("chunking") != chunking:
+                entry = None
+            
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                unchanged.append(path)
+                continue
+            
+            # Size or mtime moved; only the content hash decides whether to re-ingest
+            if entry and entry["size"] == stat.st_size and entry["sha256"] == self.file_hash(path):
+                entry["mtime_ns"] = stat.st_mtime_ns
+                self.dirty = True
+                unchanged.append(path)
+                continue
+            
+            changed.append(path)
+        
+        present = {os.path.basename(path) for path in paths}
+        removed = sorted(source for source in self.files if source not in present)
+        return changed, unchanged, removed
+    
+    def snapshot(self, path):
+        """Stat and hash a file before it is read, so the record matches what was ingested"""
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": self.file_hash(path)}
+    
+    def record(self, path, chunk_count, snapshot, chunking=None):
+        """Record a file as ingested along with the chunk settings used"""
+        self.files[os.path.basename(path)] = {**snapshot, "chunks": chunk_count, "chunking": chunking}
+        self.dirty = True
+    
+    def forget(self, source):
+        """Drop a source from the manifest"""
+        if self.files.pop(source, None) is not None:
+            self.dirty = True
+
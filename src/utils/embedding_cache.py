@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+import numpy as np
+from src.config import Config
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class EmbeddingCache:
+    """On-disk cache of text embeddings for one model, stored as a memory-mapped float32 matrix"""
+    
+    def __init__(self, model_name, directory=None):
+        self.model_name = model_name
+        self.directory = os.path.join(
+            directory or Config.EMBEDDING_CACHE_PATH,
+            re.sub(r"[^\w.-]+", "_", model_name)
+        )
+        self.keys_path = os.path.join(self.directory, "keys.txt")
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.meta_path = os.path.join(self.directory, "meta.json")
+        self.dimension = None
+        self.index = {}
+        self.vectors = None
+        self.stats = {"hits": 0, "misses": 0}
+        self._keys_size = -1
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def text_key(text):
+        """Cache key for a chunk of text"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    @contextmanager
+    def _file_lock(self):
+        """Serialise writers across processes where flock is available"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _refresh(self):
+        """Reload keys and remap vectors if another writer has appended since the last read"""
+        try:
+            keys_size = os.path.getsize(self.keys_path)
+        except OSError:
+            keys_size = 0
+        
+        if keys_size == self._keys_size:
+            return
+        
+        if self.dimension is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.dimension = json.load(f)["dimension"]
+        
+        keys = []
+        if keys_size:
+            with open(self.keys_path, encoding="utf-8") as f:
+                keys = [line.strip() for line in f if line.strip()]
+        
+        rows = 0
+        if self.dimension and os.path.exists(self.vectors_path):
+            rows = os.path.getsize(self.vectors_path) // (self.dimension * 4)
+        
+        # Keys are written after vectors, so only rows with both halves on disk count
+        count = min(len(keys), rows)
+        self.index = {key: row for row, key in enumerate(keys[:count])}
+        self.vectors = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dimension))
+            if count else None
+        )
+        self._keys_size = keys_size
+    
+    def lookup(self, texts):
+        """Return (embeddings, missing positions); rows for missing texts are left as zeros"""
+        with self._lock:
+            self._refresh()
+            
+            if self.vectors is None:
+                self.stats["misses"] += len(texts)
+                return None, list(range(len(texts)))
+            
+            embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+            missing = []
+            
+            for position, text in enumerate(texts):
+                row = self.index.get(self.text_key(text))
+                if row is None:
+                    missing.append(position)
+                else:
+                    embeddings[position] = self.vectors[row]
+            
+            self.stats["hits"] += len(texts) - len(missing)
+            self.stats["misses"] += len(missing)
+            return embeddings, missing
+    
+    def store(self, texts, embeddings):
+        """Append embeddings for texts that are not cached yet"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if not len(texts) or embeddings.ndim != 2:
+            return
+        
+        try:
+            with self._lock, self._file_lock():
+                self._refresh()
+                
+                if self.dimension is None:
+                    self.dimension = embeddings.shape[1]
+                    with open(self.meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"model": self.model_name, "dimension": self.dimension}, f)
+                elif embeddings.shape[1] != self.dimension:
+                    print(f"Embedding cache dimension mismatch for {self.model_name}, not caching")
+                    return
+                
+                new_keys, new_rows = [], []
+                for text, embedding in zip(texts, embeddings):
+                    key = self.text_key(text)
+                    if key not in self.index and key not in new_keys:
+                        new_keys.append(key)
+                        new_rows.append(embedding)
+                
+                if not new_keys:
+                    return
+                
+                # Drop vector rows left behind by a writer that died before saving their keys
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(len(self.index) * self.dimension * 4)
+                    f.write(np.stack(new_rows).tobytes())
+                
+                with open(self.keys_path, "a", encoding="utf-8") as f:
+                    f.write("".join(f"{key}\n" for key in new_keys))
+                
+                self._keys_size = -1
+        except OSError as e:
+            print(f"Error writing embedding cache: {e}")
+    
+    def get_stats(self):
+        """Get cache size and hit counts"""
+        with self._lock:
+            self._refresh()
+            return {"entries": len(self.index), **self.stats}
+
+_caches = {}
+_lock = threading.Lock()
+
+def get_embedding_cache(model_name=None):
+    """Return the process-wide embedding cache for a model"""
+    model_name = model_name or Config.EMBEDDING_MODEL
+    
+    with _lock:
+        cache = _caches.get(model_name)
+        if cache is None:
+            cache = EmbeddingCache(model_name)
+            _caches[model_name] = cache
+    
+    return cache
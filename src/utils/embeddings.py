@@ -0,0 +1,64 @@
+import threading
+import numpy as np
+from src.config import Config
+from src.utils.embedding_cache import get_embedding_cache
+
+_models = {}
+_lock = threading.Lock()
+
+def get_embedding_model(model_name=None):
+    """Return the process-wide embedding model, loading it on first use"""
+    model_name = model_name or Config.EMBEDDING_MODEL
+    
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+    
+    with _lock:
+        model = _models.get(model_name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            
+            print(f"Loading embedding model: {model_name}")
+            model = SentenceTransformer(model_name)
+            _models[model_name] = model
+    
+    return model
+
+def encode_query(text, model_name=None):
+    """Embed one query as a unit-length float32 vector"""
+    embedding = get_embedding_model(model_name).encode(text, convert_to_numpy=True, normalize_embeddings=True)
+    return np.asarray(embedding, dtype=np.float32)
+
+def encode_texts(texts, model_name=None, batch_size=None):
+    """Embed texts as one float32 matrix, reusing cached embeddings and only encoding the rest"""
+    model_name = model_name or Config.EMBEDDING_MODEL
+    batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+    
+    def encode(batch):
+        embeddings = get_embedding_model(model_name).encode(
+            batch,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    if not Config.EMBEDDING_CACHE_ENABLED:
+        return encode(texts)
+    
+    cache = get_embedding_cache(model_name)
+    embeddings, missing = cache.lookup(texts)
+    
+    if not missing:
+        return embeddings
+    
+    missing_texts = [texts[i] for i in missing]
+    encoded = encode(missing_texts)
+    cache.store(missing_texts, encoded)
+    
+    if embeddings is None:
+        return encoded
+    
+    embeddings[missing] = encoded
+    return embeddings
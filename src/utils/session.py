@@ -1,5 +1,6 @@
 import streamlit as st
 from typing import List, Dict
+from src.database.temp_index import TempDocumentIndex
 
 class SessionManager:
     """Manage Streamlit session state for conversation history"""
@@ -10,11 +11,11 @@ class SessionManager:
         if 'messages' not in st.session_state:
             st.session_state.messages = []
         
-        if 'orchestrator' not in st.session_state:
-            st.session_state.orchestrator = None
-        
         if 'uploaded_files' not in st.session_state:
             st.session_state.uploaded_files = []
+        
+        if 'temp_index' not in st.session_state:
+            st.session_state.temp_index = TempDocumentIndex()
     
     @staticmethod
     def add_message(role: str, content: str):
@@ -0,0 +1,37 @@
+from functools import lru_cache
+import tiktoken
+from src.config import Config
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name=None):
+    """Get the tiktoken encoding for a model, cached per process"""
+    model_name = model_name or Config.OPENAI_MODEL
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def count_tokens(text, model_name=None):
+    """Count the tokens in text for the configured model"""
+    if not text:
+        return 0
+    return len(get_encoding(model_name).encode(text, disallowed_special=()))
+
+def token_length_function(model_name=None, cache_size=None):
+    """Build a memoised token counter for use as a text splitter length function"""
+    model_name = model_name or Config.OPENAI_MODEL
+    get_encoding(model_name)
+    
+    @lru_cache(maxsize=cache_size or Config.TOKEN_LENGTH_CACHE_SIZE)
+    def length(text):
+        return count_tokens(text, model_name)
+    
+    return length
+
+def truncate_to_tokens(text, max_tokens, model_name=None):
+    """Cut text down to at most max_tokens tokens"""
+    encoding = get_encoding(model_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max(0, max_tokens)])